@@ -0,0 +1,113 @@
+# Location parsing as it was before src/locations.py, kept as the reference for parity checks.
+from typing import Dict, List, Optional, Tuple
+
+from locations import US_STATE_MAP
+
+
+def parse_location_parts(location: str) -> Dict[str, Optional[str]]:
+    parts = [p.strip() for p in location.split(",")]
+    if len(parts) < 2:
+        return {"city": None, "state": None, "country": None}
+    city = parts[0]
+    state = None
+    country = None
+    if len(parts) >= 3:
+        last = parts[-1].upper()
+        prev = parts[-2].upper()
+        canada_provinces = {
+            "AB", "BC", "MB", "NB", "NL", "NS", "NT", "NU", "ON", "PE", "QC", "SK", "YT"
+        }
+        if last == "CA" and prev in canada_provinces:
+            state = parts[-2]
+            country = "Canada"
+        elif last in US_STATE_MAP:
+            state = parts[-1]
+            country = "United States"
+        else:
+            state = parts[-2]
+            country = normalize_country_token(parts[-1])
+    else:
+        state = parts[-1]
+        country = infer_country_from_state(state)
+        if country not in ("United States", None):
+            state = None
+    return {"city": city, "state": state, "country": country}
+
+
+def normalize_country_token(token: Optional[str]) -> Optional[str]:
+    if not token:
+        return None
+    upper = token.upper()
+    if upper in {"US", "USA", "UNITED STATES"}:
+        return "United States"
+    if upper in {"UK", "GB", "UNITED KINGDOM"}:
+        return "United Kingdom"
+    if upper in {"CA", "CANADA"}:
+        return "Canada"
+    if upper in {"DE", "GERMANY"}:
+        return "Germany"
+    if upper in {"NL", "NE", "NETHERLANDS"}:
+        return "Netherlands"
+    if len(upper) == 2:
+        return None
+    return token
+
+
+def infer_country_from_state(state: Optional[str]) -> Optional[str]:
+    if not state:
+        return None
+    upper = state.upper()
+    if upper in US_STATE_MAP or upper == "DC":
+        return "United States"
+    if upper in {"UK", "GB", "UNITED KINGDOM"}:
+        return "United Kingdom"
+    if upper == "CANADA":
+        return "Canada"
+    if upper == "GERMANY":
+        return "Germany"
+    if upper == "NETHERLANDS":
+        return "Netherlands"
+    return None
+
+
+def countries(locations: List[str]) -> List[str]:
+    found = {}
+    for location in locations:
+        parts = parse_location_parts(location)
+        if parts["country"]:
+            found[parts["country"]] = True
+        elif parts["state"] and parts["state"].upper() in US_STATE_MAP:
+            found["United States"] = True
+    return sorted(c for c in ["United States", "Canada", "United Kingdom"] if c in found)
+
+
+def states_by_country(locations: List[str], country: str) -> List[str]:
+    states: Dict[str, bool] = {}
+    for location in locations:
+        parts = parse_location_parts(location)
+        country_token = parts["country"]
+        if country == "United States" and not country_token and parts["state"]:
+            if parts["state"].upper() in US_STATE_MAP:
+                states[parts["state"]] = True
+        elif country_token == country and parts["state"]:
+            states[parts["state"]] = True
+    return sorted(states)
+
+
+def location_group(
+    location: str,
+    group_by: str,
+    country: Optional[str],
+    state: Optional[str],
+) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    parts = parse_location_parts(location)
+    location_country = parts["country"]
+    if not location_country and parts["state"] and parts["state"].upper() in US_STATE_MAP:
+        location_country = "United States"
+    if group_by == "state":
+        if not parts["state"]:
+            return None
+        return country or location_country, parts["state"]
+    if not location_country:
+        return None
+    return location_country, state
@@ -0,0 +1,168 @@
+"""Parity check and benchmark for src/locations.py against the legacy parser.
+
+    python bench/locations_bench.py [--size 1000000] [--distinct 20000] [--repeat 3]
+
+Every distinct location in the corpus is parsed by both implementations and must agree;
+get_countries, get_states_by_country and _location_group are compared on the full corpus.
+Timings are best-of-N, with the location memo cleared before each run.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import legacy_locations as legacy  # noqa: E402
+import locations  # noqa: E402
+import queries  # noqa: E402
+
+COUNTRIES = ("United States", "Canada", "United Kingdom", "Germany", "Netherlands", "France")
+GROUP_ARGS = (
+    ("state", None, None),
+    ("state", "United States", None),
+    ("country", None, None),
+    ("country", None, "CA"),
+)
+_CITIES = ("Austin", "Toronto", "London", "Berlin", "Amsterdam", "Paris", "Springfield", "Remote")
+_TAILS = (
+    "{st}",
+    "{st}, US",
+    "{st}, USA",
+    "{prov}, CA",
+    "{prov}, Canada",
+    "England, UK",
+    "Scotland, GB",
+    "Berlin, DE",
+    "Bavaria, Germany",
+    "North Holland, NL",
+    "Ile-de-France, FR",
+    "Ile-de-France, France",
+    "UK",
+    "Canada",
+    "Germany",
+    "Netherlands",
+    "DC",
+    "{st}, {st}",
+)
+_PROVINCES = sorted(locations.CANADA_PROVINCES) + ["XX"]
+
+
+def build_corpus(size: int, distinct: int, seed: int = 7):
+    rng = random.Random(seed)
+    states = list(locations.US_STATE_MAP) + ["ZZ"]
+    pool = set()
+    while len(pool) < distinct:
+        tail = rng.choice(_TAILS).format(st=rng.choice(states), prov=rng.choice(_PROVINCES))
+        if rng.random() < 0.1:
+            tail = tail.lower()
+        city = f"{rng.choice(_CITIES)} {rng.randrange(distinct)}"
+        sep = rng.choice((", ", ",", " , "))
+        pool.add(city + sep + tail.replace(", ", sep))
+    pool = sorted(pool)
+    # Skewed reuse, like a jobs table: a few locations account for most rows.
+    weights = [1.0 / (rank + 1) for rank in range(len(pool))]
+    return pool, rng.choices(pool, weights=weights, k=size)
+
+
+@contextmanager
+def _serve(rows):
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql, params=None):
+            pass
+
+        def fetchall(self):
+            return [{"location": location} for location in rows]
+
+    class Connection:
+        def cursor(self):
+            return Cursor()
+
+    original = queries.get_read_connection
+    queries.get_read_connection = contextmanager(lambda: iter([Connection()]))
+    try:
+        yield
+    finally:
+        queries.get_read_connection = original
+
+
+def check_parity(pool, corpus) -> int:
+    mismatches = 0
+    for location in pool:
+        old = legacy.parse_location_parts(location)
+        new = locations.resolve_location(location)
+        if (new.city, new.state, new.country) != (old["city"], old["state"], old["country"]):
+            mismatches += 1
+            print(f"parse mismatch: {location!r}: {old} != {new}")
+        for args in GROUP_ARGS:
+            if queries._location_group(location, *args) != legacy.location_group(location, *args):
+                mismatches += 1
+                print(f"group mismatch: {location!r} {args}")
+    for token in {part.strip() for location in pool for part in location.split(",")[1:]}:
+        if locations.normalize_country_token(token) != legacy.normalize_country_token(token):
+            mismatches += 1
+            print(f"normalize mismatch: {token!r}")
+        if locations.infer_country_from_state(token) != legacy.infer_country_from_state(token):
+            mismatches += 1
+            print(f"infer mismatch: {token!r}")
+    with _serve(corpus):
+        if queries.get_countries("t") != legacy.countries(corpus):
+            mismatches += 1
+            print("get_countries mismatch")
+        for country in COUNTRIES:
+            expected = legacy.states_by_country(corpus, country)
+            if queries.get_states_by_country("t", country) != expected:
+                mismatches += 1
+                print(f"get_states_by_country mismatch: {country}")
+    return mismatches
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        locations.resolve_location.cache_clear()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pool, corpus = build_corpus(args.size, args.distinct)
+    mismatches = check_parity(pool, corpus)
+    print(f"parity: {len(pool)} distinct locations, {mismatches} mismatches")
+
+    cases = (
+        ("parse", lambda: [legacy.parse_location_parts(loc) for loc in corpus],
+         lambda: locations.resolve_locations(corpus)),
+        ("countries", lambda: legacy.countries(corpus), lambda: queries.get_countries("t")),
+        ("states", lambda: legacy.states_by_country(corpus, "United States"),
+         lambda: queries.get_states_by_country("t", "United States")),
+    )
+    print(f"{len(corpus)} rows, best of {args.repeat}")
+    with _serve(corpus):
+        for name, old, new in cases:
+            old_s = best_of(args.repeat, old)
+            new_s = best_of(args.repeat, new)
+            print(f"  {name:<10} legacy {old_s:7.3f}s  current {new_s:7.3f}s  x{old_s / new_s:.1f}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import asyncio
+import math
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+def _milliseconds(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        max_queue: int,
+        queue_timeout_seconds: float,
+        latency_target_seconds: Optional[float] = None,
+    ) -> None:
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.latency_target_seconds = latency_target_seconds
+        self.in_flight = 0
+        self.min_latency: Optional[float] = None
+        self.avg_latency: Optional[float] = None
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    async def acquire(self) -> bool:
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            self.timed_out += 1
+            self.rejected += 1
+            return False
+        except asyncio.CancelledError:
+            self._discard(waiter)
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        self.admitted += 1
+        return True
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, latency: Optional[float] = None, failed: bool = False) -> None:
+        self.in_flight = max(0, self.in_flight - 1)
+        if latency is not None:
+            self._observe(latency, failed)
+        self._wake()
+
+    def _observe(self, latency: float, failed: bool) -> None:
+        if self.min_latency is None or latency < self.min_latency:
+            self.min_latency = latency
+        else:
+            # Let the no-load baseline drift up slowly so a permanent shift is learned.
+            self.min_latency += (latency - self.min_latency) * 0.01
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency += (latency - self.avg_latency) * 0.1
+
+        threshold = self.min_latency * 2
+        if self.latency_target_seconds is not None:
+            threshold = max(threshold, self.latency_target_seconds)
+        if failed or latency > threshold:
+            self.limit = max(self.min_limit, self.limit * 0.9)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def _wake(self) -> None:
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(True)
+
+    def retry_after(self) -> int:
+        latency = self.avg_latency or 1.0
+        return max(1, math.ceil(latency * (self.queued + 1) / max(1, int(self.limit))))
+
+    def stats(self) -> Dict:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "min_latency_ms": _milliseconds(self.min_latency),
+            "avg_latency_ms": _milliseconds(self.avg_latency),
+        }
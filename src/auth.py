@@ -2,7 +2,7 @@ from typing import Dict, Optional
 
 import hashlib
 import httpx
-from fastapi import Header, HTTPException, status
+from fastapi import Header, HTTPException, Request, status
 
 from cache import TTLCache
 from config import get_settings
@@ -55,6 +55,7 @@ async def introspect_token(token: str) -> Dict:
 async def require_scope(
     required_scope: str,
     authorization: Optional[str] = Header(default=None, alias="Authorization"),
+    request: Optional[Request] = None,
 ) -> Dict:
     token = _extract_bearer(authorization)
     data = await introspect_token(token)
@@ -63,10 +64,21 @@ async def require_scope(
     scopes = data.get("scopes") or []
     if required_scope not in scopes:
         raise _error("FORBIDDEN", "Missing required scope", status.HTTP_403_FORBIDDEN)
+    if request is not None:
+        # Lets usage accounting count only requests made with a verified token.
+        request.state.authorized = True
     return data
 
 
 async def require_role_explorer(
+    request: Request,
     authorization: Optional[str] = Header(default=None, alias="Authorization"),
 ) -> Dict:
-    return await require_scope("read:role_explorer", authorization)
+    return await require_scope("read:role_explorer", authorization, request)
+
+
+async def require_metrics(
+    request: Request,
+    authorization: Optional[str] = Header(default=None, alias="Authorization"),
+) -> Dict:
+    return await require_scope("read:metrics", authorization, request)
@@ -1,14 +1,15 @@
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Hashable, Optional
 
 
 class TTLCache:
-    def __init__(self, ttl_seconds: int = 60):
+    def __init__(self, ttl_seconds: int = 60, max_entries: Optional[int] = None):
         self.ttl_seconds = ttl_seconds
-        self._store: Dict[str, Any] = {}
-        self._exp: Dict[str, float] = {}
+        self.max_entries = max_entries
+        self._store: Dict[Hashable, Any] = {}
+        self._exp: Dict[Hashable, float] = {}
 
-    def get(self, key: str) -> Optional[Any]:
+    def get(self, key: Hashable) -> Optional[Any]:
         now = time.time()
         exp = self._exp.get(key)
         if exp is None or exp < now:
@@ -17,6 +18,12 @@ class TTLCache:
             return None
         return self._store.get(key)
 
-    def set(self, key: str, value: Any) -> None:
+    def set(self, key: Hashable, value: Any) -> None:
+        self._store.pop(key, None)
         self._store[key] = value
         self._exp[key] = time.time() + self.ttl_seconds
+        if self.max_entries is not None:
+            while len(self._store) > self.max_entries:
+                oldest = next(iter(self._store))
+                self._store.pop(oldest, None)
+                self._exp.pop(oldest, None)
@@ -0,0 +1,66 @@
+from typing import Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency: pip install "scanrole-api[arrow]"
+    pa = None
+    pq = None
+
+FORMATS = ("json", "arrow", "parquet")
+MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+SENIORITY_LEVELS = ("Junior", "Mid", "Senior", "Staff", "Principal")
+
+# Flat layout of a role-explorer row: seniority_counts is spread into one column per level.
+_STRING_FIELDS = ("role", "country", "state")
+_INT_FIELDS = ("jobs_current", "jobs_prev")
+_FLOAT_FIELDS = (
+    "jobs_delta_pct",
+    "salary_current",
+    "salary_prev",
+    "salary_delta_pct",
+    "remote_current",
+    "remote_prev",
+    "remote_delta_pp",
+    "confidence_current",
+)
+_TREND_FIELDS = ("jobs_trend", "salary_trend", "remote_trend")
+
+
+def arrow_available() -> bool:
+    return pa is not None
+
+
+def role_rows_table(rows: List[Dict], periods: List[int], metadata: Dict[str, Optional[str]]):
+    columns = {"period_days": pa.array(periods, pa.int16())}
+    for name in _STRING_FIELDS:
+        columns[name] = pa.array([row[name] for row in rows], pa.string())
+    for name in _INT_FIELDS:
+        columns[name] = pa.array([row[name] for row in rows], pa.int64())
+    for name in _FLOAT_FIELDS:
+        columns[name] = pa.array([row[name] for row in rows], pa.float64())
+    for name in _TREND_FIELDS:
+        # Three distinct values: dictionary-encode so consumers get a categorical column.
+        columns[name] = pa.array([row[name] for row in rows], pa.string()).dictionary_encode()
+    for level in SENIORITY_LEVELS:
+        columns[f"seniority_{level.lower()}"] = pa.array(
+            [row["seniority_counts"][level] for row in rows], pa.int32()
+        )
+    table = pa.table(columns)
+    return table.replace_schema_metadata(
+        {key: "" if value is None else str(value) for key, value in metadata.items()}
+    )
+
+
+def encode_table(table, fmt: str) -> bytes:
+    sink = pa.BufferOutputStream()
+    if fmt == "parquet":
+        pq.write_table(table, sink, compression="zstd")
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
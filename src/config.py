@@ -10,9 +10,14 @@ class Settings:
     wp_introspect_url: str
     wp_introspect_secret: str
     db_host: str
+    db_port: int
     db_name: str
     db_user: str
     db_pass: str
+    db_read_hosts: str
+    db_read_max_lag_seconds: int
+    db_read_check_interval_seconds: int
+    db_connect_timeout_seconds: int
     role_table: str
     api_base_url: str
     log_level: str
@@ -23,6 +28,35 @@ class Settings:
     rate_limit_token_per_day: int
     rate_limit_health_per_minute: int
     trust_proxy_headers: bool
+    role_explorer_cache_ttl_seconds: int
+    role_explorer_cache_max_entries: int
+    data_version_poll_seconds: int
+    data_version_table: str
+    data_version_column: str
+    cache_warm_top_k: int
+    cache_warm_concurrency: int
+    usage_db_path: str
+    usage_flush_seconds: int
+    usage_retention_days: int
+    admission_enabled: bool
+    admission_initial_limit: int
+    admission_min_limit: int
+    admission_max_limit: int
+    admission_queue_size: int
+    admission_queue_timeout_ms: int
+    admission_latency_target_ms: int
+    admission_priority_limit: int
+    query_deadline_ms: int
+    snapshot_max_versions: int
+    snapshot_max_views: int
+    shared_cache_enabled: bool
+    shared_cache_path: str
+    shared_cache_slots: int
+    shared_cache_slot_bytes: int
+    access_log_enabled: bool
+    log_queue_size: int
+    log_sample_interval_seconds: int
+    log_sample_burst: int
 
 
 def get_settings() -> Settings:
@@ -30,9 +64,14 @@ def get_settings() -> Settings:
         wp_introspect_url=os.getenv("WP_INTROSPECT_URL", "").strip(),
         wp_introspect_secret=os.getenv("WP_INTROSPECT_SECRET", "").strip(),
         db_host=os.getenv("DB_HOST", ""),
+        db_port=int(os.getenv("DB_PORT", "3306")),
         db_name=os.getenv("DB_NAME", ""),
         db_user=os.getenv("DB_USER", ""),
         db_pass=os.getenv("DB_PASS", ""),
+        db_read_hosts=os.getenv("DB_READ_HOSTS", "").strip(),
+        db_read_max_lag_seconds=int(os.getenv("DB_READ_MAX_LAG_SECONDS", "30")),
+        db_read_check_interval_seconds=int(os.getenv("DB_READ_CHECK_INTERVAL_SECONDS", "10")),
+        db_connect_timeout_seconds=int(os.getenv("DB_CONNECT_TIMEOUT_SECONDS", "5")),
         role_table=os.getenv("ROLE_TABLE", "jobspy_normalized_jobs"),
         api_base_url=os.getenv("API_BASE_URL", "*"),
         log_level=os.getenv("LOG_LEVEL", "info"),
@@ -43,4 +82,36 @@ def get_settings() -> Settings:
         rate_limit_token_per_day=int(os.getenv("RATE_LIMIT_TOKEN_PER_DAY", "2000")),
         rate_limit_health_per_minute=int(os.getenv("RATE_LIMIT_HEALTH_PER_MINUTE", "300")),
         trust_proxy_headers=os.getenv("TRUST_PROXY_HEADERS", "false").lower() in ("1", "true", "yes", "on"),
+        role_explorer_cache_ttl_seconds=int(os.getenv("ROLE_EXPLORER_CACHE_TTL_SECONDS", "3600")),
+        role_explorer_cache_max_entries=int(os.getenv("ROLE_EXPLORER_CACHE_MAX_ENTRIES", "2048")),
+        data_version_poll_seconds=int(os.getenv("DATA_VERSION_POLL_SECONDS", "60")),
+        data_version_table=os.getenv("DATA_VERSION_TABLE", "").strip(),
+        data_version_column=os.getenv("DATA_VERSION_COLUMN", "updated_at").strip(),
+        cache_warm_top_k=int(os.getenv("CACHE_WARM_TOP_K", "20")),
+        cache_warm_concurrency=int(os.getenv("CACHE_WARM_CONCURRENCY", "2")),
+        usage_db_path=os.getenv("USAGE_DB_PATH", "usage.sqlite3"),
+        usage_flush_seconds=int(os.getenv("USAGE_FLUSH_SECONDS", "10")),
+        usage_retention_days=int(os.getenv("USAGE_RETENTION_DAYS", "90")),
+        admission_enabled=os.getenv("ADMISSION_ENABLED", "true").lower()
+        in ("1", "true", "yes", "on"),
+        admission_initial_limit=int(os.getenv("ADMISSION_INITIAL_LIMIT", "8")),
+        admission_min_limit=int(os.getenv("ADMISSION_MIN_LIMIT", "2")),
+        admission_max_limit=int(os.getenv("ADMISSION_MAX_LIMIT", "32")),
+        admission_queue_size=int(os.getenv("ADMISSION_QUEUE_SIZE", "32")),
+        admission_queue_timeout_ms=int(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "5000")),
+        admission_latency_target_ms=int(os.getenv("ADMISSION_LATENCY_TARGET_MS", "2000")),
+        admission_priority_limit=int(os.getenv("ADMISSION_PRIORITY_LIMIT", "8")),
+        query_deadline_ms=int(os.getenv("QUERY_DEADLINE_MS", "25000")),
+        snapshot_max_versions=int(os.getenv("SNAPSHOT_MAX_VERSIONS", "4")),
+        snapshot_max_views=int(os.getenv("SNAPSHOT_MAX_VIEWS", "256")),
+        shared_cache_enabled=os.getenv("SHARED_CACHE_ENABLED", "true").lower()
+        in ("1", "true", "yes", "on"),
+        shared_cache_path=os.getenv("SHARED_CACHE_PATH", "/dev/shm/scanrole-api-cache"),
+        shared_cache_slots=int(os.getenv("SHARED_CACHE_SLOTS", "512")),
+        shared_cache_slot_bytes=int(os.getenv("SHARED_CACHE_SLOT_BYTES", "131072")),
+        access_log_enabled=os.getenv("ACCESS_LOG_ENABLED", "true").lower()
+        in ("1", "true", "yes", "on"),
+        log_queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+        log_sample_interval_seconds=int(os.getenv("LOG_SAMPLE_INTERVAL_SECONDS", "10")),
+        log_sample_burst=int(os.getenv("LOG_SAMPLE_BURST", "5")),
     )
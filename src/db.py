@@ -1,21 +1,291 @@
+import asyncio
+import logging
+import math
+import random
+import threading
+import time
 from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
 import pymysql
 
-from config import get_settings
+from config import Settings, get_settings
+from deadline import Connection, QueryCancelled, current_budget
 
+logger = logging.getLogger("scanrole.db")
 
-@contextmanager
-def get_connection():
-    settings = get_settings()
-    conn = pymysql.connect(
-        host=settings.db_host,
+
+@dataclass
+class ReadEndpoint:
+    host: str
+    port: int
+    weight: int = 1
+    healthy: bool = True
+    lag_seconds: Optional[float] = None
+    checked_at: float = 0.0
+    failures: int = 0
+    data_version: Optional[str] = None
+
+
+def parse_read_hosts(value: str, default_port: int = 3306) -> List[ReadEndpoint]:
+    endpoints = []
+    for raw in value.split(","):
+        item = raw.strip()
+        if not item:
+            continue
+        weight = 1
+        if "*" in item:
+            item, weight_str = item.rsplit("*", 1)
+            weight = max(0, int(weight_str))
+        port = default_port
+        if ":" in item:
+            item, port_str = item.rsplit(":", 1)
+            port = int(port_str)
+        if weight > 0:
+            endpoints.append(ReadEndpoint(host=item.strip(), port=port, weight=weight))
+    return endpoints
+
+
+def _connect(settings: Settings, host: str, port: int, read_timeout: Optional[float] = None):
+    return pymysql.connect(
+        host=host,
+        port=port,
         user=settings.db_user,
         password=settings.db_pass,
         database=settings.db_name,
         cursorclass=pymysql.cursors.DictCursor,
         autocommit=True,
+        connect_timeout=settings.db_connect_timeout_seconds,
+        read_timeout=read_timeout,
     )
+
+
+def _replication_lag(conn) -> Optional[float]:
+    with conn.cursor() as cur:
+        try:
+            cur.execute("SHOW REPLICA STATUS")
+        except pymysql.err.MySQLError:
+            cur.execute("SHOW SLAVE STATUS")
+        row = cur.fetchone()
+    if not row:
+        # Not configured as a replica (e.g. a standalone MySQL-compatible stand-in).
+        return 0.0
+    lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+    return float(lag) if lag is not None else None
+
+
+def version_at_least(current: Optional[str], required: str) -> bool:
+    if current is None:
+        return False
+    if current.isdigit() and required.isdigit():
+        return int(current) >= int(required)
+    # Datetime versions ("YYYY-MM-DD HH:MM:SS") order correctly as strings.
+    return current >= required
+
+
+class ReadRouter:
+    def __init__(
+        self, endpoints: List[ReadEndpoint], max_lag_seconds: int, check_interval_seconds: int
+    ) -> None:
+        self.endpoints = endpoints
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.version_probe: Optional[Callable] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def check(self, endpoint: ReadEndpoint, settings: Settings) -> None:
+        version = None
+        try:
+            conn = _connect(settings, endpoint.host, endpoint.port)
+            try:
+                lag = _replication_lag(conn)
+                if self.version_probe is not None:
+                    try:
+                        version = self.version_probe(conn)
+                    except pymysql.err.MySQLError as exc:
+                        logger.warning(
+                            "Data version probe on %s:%s failed: %s",
+                            endpoint.host,
+                            endpoint.port,
+                            exc,
+                        )
+            finally:
+                conn.close()
+        except pymysql.err.MySQLError as exc:
+            self.mark_failed(endpoint, exc)
+            return
+        with self._lock:
+            endpoint.checked_at = time.time()
+            endpoint.lag_seconds = lag
+            endpoint.healthy = lag is not None and lag <= self.max_lag_seconds
+            endpoint.failures = 0
+            endpoint.data_version = version
+        if not endpoint.healthy:
+            logger.warning("Read replica %s:%s lagging lag=%s", endpoint.host, endpoint.port, lag)
+
+    def check_all(self, settings: Settings) -> None:
+        for endpoint in self.endpoints:
+            self.check(endpoint, settings)
+
+    def mark_failed(self, endpoint: ReadEndpoint, exc: Exception) -> None:
+        with self._lock:
+            endpoint.healthy = False
+            endpoint.checked_at = time.time()
+            endpoint.failures += 1
+        logger.warning("Read replica %s:%s unavailable: %s", endpoint.host, endpoint.port, exc)
+
+    def candidates(self, min_version: Optional[str] = None) -> List[ReadEndpoint]:
+        with self._lock:
+            healthy = [
+                endpoint
+                for endpoint in self.endpoints
+                if endpoint.healthy
+                and (min_version is None or version_at_least(endpoint.data_version, min_version))
+            ]
+        ordered = []
+        while healthy:
+            endpoint = random.choices(healthy, weights=[e.weight for e in healthy])[0]
+            healthy.remove(endpoint)
+            ordered.append(endpoint)
+        return ordered
+
+    def newest_version(self) -> Optional[str]:
+        with self._lock:
+            versions = [
+                e.data_version for e in self.endpoints if e.healthy and e.data_version is not None
+            ]
+        newest = None
+        for version in versions:
+            if newest is None or not version_at_least(newest, version):
+                newest = version
+        return newest
+
+    async def run(self, settings: Settings) -> None:
+        # Health checks run here rather than in request threads, so a dead replica costs
+        # connect timeouts only in the background.
+        while True:
+            await asyncio.to_thread(self.check_all, settings)
+            await asyncio.sleep(self.check_interval_seconds)
+
+    def start(self, settings: Settings, version_probe: Optional[Callable] = None) -> None:
+        self.version_probe = version_probe
+        if self._task is None and self.check_interval_seconds > 0:
+            self._task = asyncio.create_task(self.run(settings))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> List[Dict]:
+        return [
+            {
+                "host": f"{endpoint.host}:{endpoint.port}",
+                "weight": endpoint.weight,
+                "healthy": endpoint.healthy,
+                "lag_seconds": endpoint.lag_seconds,
+                "data_version": endpoint.data_version,
+                "failures": endpoint.failures,
+            }
+            for endpoint in self.endpoints
+        ]
+
+
+_read_router: Optional[ReadRouter] = None
+_read_router_loaded = False
+_read_router_lock = threading.Lock()
+
+
+def get_read_router() -> Optional[ReadRouter]:
+    global _read_router, _read_router_loaded
+    if not _read_router_loaded:
+        with _read_router_lock:
+            if not _read_router_loaded:
+                settings = get_settings()
+                endpoints = parse_read_hosts(settings.db_read_hosts, settings.db_port)
+                if endpoints:
+                    _read_router = ReadRouter(
+                        endpoints,
+                        settings.db_read_max_lag_seconds,
+                        settings.db_read_check_interval_seconds,
+                    )
+                _read_router_loaded = True
+    return _read_router
+
+
+@contextmanager
+def get_read_connection():
+    settings = get_settings()
+    budget = current_budget()
+    read_timeout = None
+    if budget is not None:
+        budget.check()
+        read_timeout = max(1, math.ceil(budget.remaining()))
+    router = get_read_router()
+    primary = (settings.db_host, settings.db_port)
+    # Every statement of one computation reads from the same endpoint, and only from an
+    # endpoint that has caught up to the data version the result is cached under.
+    pinned = budget.endpoint if budget is not None else None
+    conn = None
+    host, port = primary
+    if router is not None and pinned != primary:
+        endpoints = router.candidates(budget.min_version if budget is not None else None)
+        if pinned is not None:
+            endpoints = [e for e in endpoints if (e.host, e.port) == pinned]
+        for endpoint in endpoints:
+            try:
+                conn = _connect(settings, endpoint.host, endpoint.port, read_timeout)
+                host, port = endpoint.host, endpoint.port
+                break
+            except pymysql.err.MySQLError as exc:
+                router.mark_failed(endpoint, exc)
+    if conn is None:
+        conn = _connect(settings, host, port, read_timeout)
+    connection = (host, port, conn.thread_id())
+    if budget is not None:
+        budget.endpoint = (host, port)
+        budget.track(connection)
     try:
         yield conn
     finally:
+        if budget is not None:
+            budget.untrack(connection)
         conn.close()
+
+
+def execute(cur, sql: str, params=None) -> None:
+    budget = current_budget()
+    if budget is None:
+        cur.execute(sql, params)
+        return
+    budget.check()
+    if sql.startswith("SELECT "):
+        timeout_ms = max(1, int(budget.remaining() * 1000))
+        sql = f"SELECT /*+ MAX_EXECUTION_TIME({timeout_ms}) */ " + sql[len("SELECT ") :]
+    try:
+        cur.execute(sql, params)
+    except pymysql.err.MySQLError as exc:
+        if budget.expired():
+            reason = "Client disconnected" if budget.cancelled else "Query deadline exceeded"
+            raise QueryCancelled(reason) from exc
+        raise
+
+
+def kill_queries(connections: List[Connection]) -> None:
+    settings = get_settings()
+    for host, port, thread_id in connections:
+        try:
+            conn = _connect(settings, host, port)
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("KILL QUERY %s", (thread_id,))
+            finally:
+                conn.close()
+        except pymysql.err.MySQLError as exc:
+            logger.warning("KILL QUERY %s on %s:%s failed: %s", thread_id, host, port, exc)
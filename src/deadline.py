@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import time
+from contextvars import ContextVar
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+Connection = Tuple[str, int, int]
+
+
+class QueryCancelled(Exception):
+    pass
+
+
+class RequestScope:
+    def __init__(self, timeout_seconds: float) -> None:
+        # One deadline for the whole request, however many computations it runs.
+        self.deadline = time.monotonic() + timeout_seconds
+        self.disconnected = False
+        self.budgets: List["QueryBudget"] = []
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def disconnect(self) -> List[Connection]:
+        self.disconnected = True
+        connections: List[Connection] = []
+        for budget in self.budgets:
+            connections.extend(budget.abandon_if_unwanted())
+        return connections
+
+
+class QueryBudget:
+    def __init__(
+        self, timeout_seconds: float, pinned: bool = False, min_version: Optional[str] = None
+    ) -> None:
+        self.deadline = time.monotonic() + timeout_seconds
+        # Pinned budgets belong to background work and are never cancelled on disconnect.
+        self.pinned = pinned
+        self.cancelled = False
+        # Read endpoint used by the computation, and the data version it must have reached.
+        self.endpoint: Optional[Tuple[str, int]] = None
+        self.min_version = min_version
+        self._scopes: List[RequestScope] = []
+        self._connections: Set[Connection] = set()
+        self._lock = threading.Lock()
+
+    def attach(self, scope: RequestScope) -> None:
+        with self._lock:
+            self._scopes.append(scope)
+            self.deadline = min(self.deadline, scope.deadline)
+        scope.budgets.append(self)
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.cancelled or self.remaining() <= 0
+
+    def check(self) -> None:
+        if self.cancelled:
+            raise QueryCancelled("Client disconnected")
+        if self.remaining() <= 0:
+            raise QueryCancelled("Query deadline exceeded")
+
+    def track(self, connection: Connection) -> None:
+        with self._lock:
+            self._connections.add(connection)
+
+    def untrack(self, connection: Connection) -> None:
+        with self._lock:
+            self._connections.discard(connection)
+
+    def abandon_if_unwanted(self) -> List[Connection]:
+        with self._lock:
+            wanted = any(not scope.disconnected for scope in self._scopes)
+            if self.pinned or self.cancelled or wanted:
+                return []
+            self.cancelled = True
+            return list(self._connections)
+
+
+_current_budget: ContextVar[Optional[QueryBudget]] = ContextVar("query_budget", default=None)
+current_scope: ContextVar[Optional[RequestScope]] = ContextVar("request_scope", default=None)
+
+
+def current_budget() -> Optional[QueryBudget]:
+    return _current_budget.get()
+
+
+def check_budget() -> None:
+    budget = _current_budget.get()
+    if budget is not None:
+        budget.check()
+
+
+def run_with_budget(budget: QueryBudget, fn, *args):
+    token = _current_budget.set(budget)
+    try:
+        return fn(*args)
+    finally:
+        _current_budget.reset(token)
+
+
+class DisconnectMiddleware:
+    # Pure ASGI so it sees the server's own receive channel: http.disconnect never reaches
+    # endpoints through @app.middleware("http") layers. Creates the request's RequestScope,
+    # reads the request body up front and then waits on receive for the disconnect.
+    def __init__(
+        self,
+        app,
+        timeout_seconds: float,
+        on_disconnect: Callable[[List[Connection]], Awaitable[None]],
+    ) -> None:
+        self.app = app
+        self.timeout_seconds = timeout_seconds
+        self.on_disconnect = on_disconnect
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_scope = RequestScope(self.timeout_seconds)
+        scope.setdefault("state", {})["request_scope"] = request_scope
+
+        pending = []
+        while True:
+            message = await receive()
+            pending.append(message)
+            if message["type"] != "http.request" or not message.get("more_body"):
+                break
+        gone_early = pending[-1]["type"] == "http.disconnect"
+        disconnected = asyncio.Event()
+
+        async def watch() -> None:
+            if not gone_early:
+                while (await receive())["type"] != "http.disconnect":
+                    pass
+            disconnected.set()
+            connections = request_scope.disconnect()
+            if connections:
+                await self.on_disconnect(connections)
+
+        async def replay_receive():
+            if pending:
+                return pending.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        watcher = asyncio.create_task(watch())
+        try:
+            await self.app(scope, replay_receive, send)
+        finally:
+            watcher.cancel()
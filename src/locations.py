@@ -0,0 +1,168 @@
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+US_STATE_MAP = {
+    "AL": "Alabama",
+    "AK": "Alaska",
+    "AZ": "Arizona",
+    "AR": "Arkansas",
+    "CA": "California",
+    "CO": "Colorado",
+    "CT": "Connecticut",
+    "DE": "Delaware",
+    "FL": "Florida",
+    "GA": "Georgia",
+    "HI": "Hawaii",
+    "ID": "Idaho",
+    "IL": "Illinois",
+    "IN": "Indiana",
+    "IA": "Iowa",
+    "KS": "Kansas",
+    "KY": "Kentucky",
+    "LA": "Louisiana",
+    "ME": "Maine",
+    "MD": "Maryland",
+    "MA": "Massachusetts",
+    "MI": "Michigan",
+    "MN": "Minnesota",
+    "MS": "Mississippi",
+    "MO": "Missouri",
+    "MT": "Montana",
+    "NE": "Nebraska",
+    "NV": "Nevada",
+    "NH": "New Hampshire",
+    "NJ": "New Jersey",
+    "NM": "New Mexico",
+    "NY": "New York",
+    "NC": "North Carolina",
+    "ND": "North Dakota",
+    "OH": "Ohio",
+    "OK": "Oklahoma",
+    "OR": "Oregon",
+    "PA": "Pennsylvania",
+    "RI": "Rhode Island",
+    "SC": "South Carolina",
+    "SD": "South Dakota",
+    "TN": "Tennessee",
+    "TX": "Texas",
+    "UT": "Utah",
+    "VT": "Vermont",
+    "VA": "Virginia",
+    "WA": "Washington",
+    "WV": "West Virginia",
+    "WI": "Wisconsin",
+    "WY": "Wyoming",
+    "DC": "District of Columbia",
+}
+
+CANADA_PROVINCES = frozenset(
+    {"AB", "BC", "MB", "NB", "NL", "NS", "NT", "NU", "ON", "PE", "QC", "SK", "YT"}
+)
+
+# Upper-cased country token (last part of "City, State, Country") -> country name.
+_COUNTRY_TOKENS: Dict[str, str] = {
+    "US": "United States",
+    "USA": "United States",
+    "UNITED STATES": "United States",
+    "UK": "United Kingdom",
+    "GB": "United Kingdom",
+    "UNITED KINGDOM": "United Kingdom",
+    "CA": "Canada",
+    "CANADA": "Canada",
+    "DE": "Germany",
+    "GERMANY": "Germany",
+    "NL": "Netherlands",
+    "NE": "Netherlands",
+    "NETHERLANDS": "Netherlands",
+}
+
+# Upper-cased second part of a two-part location ("City, X") -> country name.
+_STATE_COUNTRIES: Dict[str, str] = {
+    **{code: "United States" for code in US_STATE_MAP},
+    "UK": "United Kingdom",
+    "GB": "United Kingdom",
+    "UNITED KINGDOM": "United Kingdom",
+    "CANADA": "Canada",
+    "GERMANY": "Germany",
+    "NETHERLANDS": "Netherlands",
+}
+
+LOCATION_MEMO_SIZE = 65536
+
+
+class Location(NamedTuple):
+    city: Optional[str]
+    state: Optional[str]
+    country: Optional[str]
+    # country, or "United States" when only a US state code is known.
+    region_country: Optional[str]
+
+
+_UNKNOWN = Location(None, None, None, None)
+
+
+def normalize_country_token(token: Optional[str]) -> Optional[str]:
+    if not token:
+        return None
+    upper = token.upper()
+    country = _COUNTRY_TOKENS.get(upper)
+    if country is not None:
+        return country
+    if len(upper) == 2:
+        return None
+    return token
+
+
+def infer_country_from_state(state: Optional[str]) -> Optional[str]:
+    if not state:
+        return None
+    return _STATE_COUNTRIES.get(state.upper())
+
+
+def _resolve(location: str) -> Location:
+    parts = location.split(",")
+    if len(parts) < 2:
+        return _UNKNOWN
+    city = parts[0].strip()
+    last = parts[-1].strip()
+    if len(parts) >= 3:
+        last_upper = last.upper()
+        prev = parts[-2].strip()
+        if last_upper == "CA" and prev.upper() in CANADA_PROVINCES:
+            return Location(city, prev, "Canada", "Canada")
+        if last_upper in US_STATE_MAP:
+            return Location(city, last, "United States", "United States")
+        state = prev
+        country = normalize_country_token(last)
+    else:
+        state = last
+        country = infer_country_from_state(state)
+        if country not in ("United States", None):
+            state = None
+    region_country = country
+    if not region_country and state and state.upper() in US_STATE_MAP:
+        region_country = "United States"
+    return Location(city, state, country, region_country)
+
+
+resolve_location = lru_cache(maxsize=LOCATION_MEMO_SIZE)(_resolve)
+
+
+def resolve_locations(locations: Sequence[str]) -> List[Location]:
+    distinct = set(locations)
+    # A column with more distinct values than the memo holds would only churn it.
+    resolve = resolve_location if len(distinct) <= LOCATION_MEMO_SIZE else _resolve
+    if len(distinct) == len(locations):
+        return [resolve(location) for location in locations]
+    resolved = {location: resolve(location) for location in distinct}
+    return [resolved[location] for location in locations]
+
+
+def memo_stats() -> Dict[str, int]:
+    info = resolve_location.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+    }
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Hashable, Optional, Tuple
+
+ACCESS_LOGGER = "scanrole.access"
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        payload.update(getattr(record, "fields", None) or {})
+        return json.dumps(payload, separators=(",", ":"), default=str)
+
+
+class _NameFilter(logging.Filter):
+    def __init__(self, name: str, include: bool) -> None:
+        super().__init__()
+        self.prefix = name
+        self.include = include
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.name.startswith(self.prefix) == self.include
+
+
+class SampledLogger:
+    def __init__(
+        self, logger: logging.Logger, interval_seconds: float, burst: int, max_keys: int = 10000
+    ) -> None:
+        self.logger = logger
+        self.interval_seconds = interval_seconds
+        self.burst = burst
+        self.max_keys = max_keys
+        # key -> (window start, emitted in window, suppressed in window)
+        self._windows: Dict[Hashable, Tuple[float, int, int]] = {}
+        self._lock = threading.Lock()
+
+    def log(
+        self, key: Hashable, level: int, msg: str, *args, fields: Optional[dict] = None
+    ) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._windows and len(self._windows) >= self.max_keys:
+                key = "*"
+            start, emitted, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - start >= self.interval_seconds:
+                start, emitted = now, 0
+            if emitted >= self.burst:
+                self._windows[key] = (start, emitted, suppressed + 1)
+                return
+            self._windows[key] = (start, emitted + 1, 0)
+        fields = dict(fields or {})
+        if suppressed:
+            msg += " suppressed=%s"
+            args += (suppressed,)
+            fields["suppressed"] = suppressed
+        self.logger.log(level, msg, *args, extra={"fields": fields})
+
+    def warning(self, key: Hashable, msg: str, *args, fields: Optional[dict] = None) -> None:
+        self.log(key, logging.WARNING, msg, *args, fields=fields)
+
+    def flush(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                (key, suppressed)
+                for key, (start, _, suppressed) in self._windows.items()
+                if now - start >= self.interval_seconds
+            ]
+            for key, _ in expired:
+                del self._windows[key]
+        for key, suppressed in expired:
+            if suppressed:
+                self.logger.warning(
+                    "Suppressed %s log lines key=%s",
+                    suppressed,
+                    key,
+                    extra={"fields": {"key": str(key), "suppressed": suppressed}},
+                )
+
+
+class LogPipeline:
+    def __init__(self, level: str, queue_size: int, sample_interval_seconds: float) -> None:
+        if isinstance(level, str):
+            level = getattr(logging, level.upper(), logging.INFO)
+        self.level = level
+        self.sample_interval_seconds = sample_interval_seconds
+        self.handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+        self._samplers = []
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def sampler(self, name: str, burst: int) -> SampledLogger:
+        sampler = SampledLogger(logging.getLogger(name), self.sample_interval_seconds, burst)
+        self._samplers.append(sampler)
+        return sampler
+
+    def install(self) -> None:
+        app_logger = logging.getLogger("scanrole")
+        app_logger.setLevel(self.level)
+        app_logger.propagate = False
+        if self.handler not in app_logger.handlers:
+            app_logger.addHandler(self.handler)
+
+    async def _flush_samplers(self) -> None:
+        while True:
+            await asyncio.sleep(self.sample_interval_seconds)
+            for sampler in self._samplers:
+                sampler.flush()
+
+    def start(self) -> None:
+        self.install()
+        if self._listener is None:
+            access = logging.StreamHandler(sys.stdout)
+            access.setFormatter(JsonFormatter())
+            access.addFilter(_NameFilter(ACCESS_LOGGER, include=True))
+            general = logging.StreamHandler(sys.stderr)
+            general.setFormatter(
+                logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+            )
+            general.addFilter(_NameFilter(ACCESS_LOGGER, include=False))
+            self._listener = logging.handlers.QueueListener(self.handler.queue, access, general)
+            self._listener.start()
+        if self._task is None and self.sample_interval_seconds > 0:
+            self._task = asyncio.create_task(self._flush_samplers())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for sampler in self._samplers:
+            sampler.flush()
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"queued": self.handler.queue.qsize(), "dropped": self.handler.dropped}
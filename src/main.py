@@ -1,29 +1,159 @@
-from datetime import date, datetime, timedelta
+import asyncio
 import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from datetime import timedelta
 from typing import Optional, Tuple
 
-from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from pymysql.err import MySQLError
 
-from auth import require_role_explorer
+from admission import AdaptiveLimiter
+from auth import require_metrics, require_role_explorer
+from cache import TTLCache
+from columnar import FORMATS, MEDIA_TYPES, arrow_available, encode_table, role_rows_table
 from config import get_settings
-from rate_limit import InMemoryRateLimitStore, extract_client_ip, extract_token_identifier
+from db import get_read_router, kill_queries
+from deadline import (
+    DisconnectMiddleware,
+    QueryBudget,
+    QueryCancelled,
+    RequestScope,
+    check_budget,
+    current_scope,
+    run_with_budget,
+)
+from locations import memo_stats as location_memo_stats
+from logs import ACCESS_LOGGER, LogPipeline
+from pagination import (
+    TIE_BREAK_FIELDS,
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    select_page,
+    sort_key,
+)
 from queries import (
     compute_delta,
     get_countries,
+    get_data_version,
+    get_grouped_metrics,
     get_last_update,
     get_metrics,
+    get_multi_period_metrics,
     get_role_end_dates,
     get_roles,
     get_states_by_country,
+    has_column,
+    read_data_version,
+    to_date,
 )
+from rate_limit import InMemoryRateLimitStore, extract_client_ip, extract_token_identifier
+from shm_cache import open_shared_cache
+from singleflight import SingleFlight
+from snapshots import SnapshotStore, diff_snapshots
+from usage import UsageRecorder
+from warming import CacheWarmer, WarmClaims
 
 settings = get_settings()
-app = FastAPI(title="ScanRole API", version="1.0.0")
 rate_limit_store = InMemoryRateLimitStore()
-rate_limit_logger = logging.getLogger("scanrole.rate_limit")
+log_pipeline = LogPipeline(
+    level=settings.log_level,
+    queue_size=settings.log_queue_size,
+    sample_interval_seconds=settings.log_sample_interval_seconds,
+)
+rate_limit_logger = log_pipeline.sampler("scanrole.rate_limit", burst=settings.log_sample_burst)
+access_logger = logging.getLogger(ACCESS_LOGGER)
+access_rejection_logger = log_pipeline.sampler(ACCESS_LOGGER, burst=settings.log_sample_burst)
+data_version_logger = logging.getLogger("scanrole.data_version")
+snapshot_logger = logging.getLogger("scanrole.snapshots")
+# (table, column) read as MAX(column) for the data version; checked once at startup.
+data_version_source = (
+    settings.data_version_table or settings.role_table,
+    settings.data_version_column,
+)
+role_explorer_flights = SingleFlight()
+shared_cache = (
+    open_shared_cache(
+        settings.shared_cache_path,
+        settings.shared_cache_slots,
+        settings.shared_cache_slot_bytes,
+    )
+    if settings.shared_cache_enabled
+    else None
+)
+role_explorer_budgets = {}
+role_explorer_snapshots = SnapshotStore(
+    max_versions=settings.snapshot_max_versions,
+    max_views=settings.snapshot_max_views,
+    shared=shared_cache,
+    shared_ttl_seconds=settings.role_explorer_cache_ttl_seconds * settings.snapshot_max_versions,
+)
+role_explorer_cache = TTLCache(
+    ttl_seconds=settings.role_explorer_cache_ttl_seconds,
+    max_entries=settings.role_explorer_cache_max_entries,
+)
+cache_warmer = CacheWarmer(
+    top_k=settings.cache_warm_top_k,
+    concurrency=settings.cache_warm_concurrency,
+    poll_seconds=settings.data_version_poll_seconds,
+    # Workers share warmed results through the shared cache, so one of them warms a version.
+    # Its claim outlives a warm run in which every hot view takes the full query deadline.
+    claims=WarmClaims(
+        shared_cache,
+        ttl_seconds=settings.query_deadline_ms
+        / 1000
+        * math.ceil(settings.cache_warm_top_k / max(1, settings.cache_warm_concurrency)),
+        done_ttl_seconds=settings.role_explorer_cache_ttl_seconds,
+    )
+    if shared_cache is not None
+    else None,
+)
+data_limiter = AdaptiveLimiter(
+    initial_limit=settings.admission_initial_limit,
+    min_limit=settings.admission_min_limit,
+    max_limit=settings.admission_max_limit,
+    max_queue=settings.admission_queue_size,
+    queue_timeout_seconds=settings.admission_queue_timeout_ms / 1000,
+    latency_target_seconds=settings.admission_latency_target_ms / 1000,
+)
+priority_limiter = AdaptiveLimiter(
+    initial_limit=settings.admission_priority_limit,
+    min_limit=settings.admission_priority_limit,
+    max_limit=settings.admission_priority_limit,
+    max_queue=settings.admission_queue_size,
+    queue_timeout_seconds=settings.admission_queue_timeout_ms / 1000,
+)
+usage_recorder = UsageRecorder(
+    db_path=settings.usage_db_path,
+    flush_seconds=settings.usage_flush_seconds,
+    retention_days=settings.usage_retention_days,
+)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    log_pipeline.start()
+    await run_in_threadpool(_check_data_version_source)
+    router = get_read_router()
+    if router is not None:
+        router.start(settings, _probe_data_version)
+    cache_warmer.start(_load_data_version, _warm_role_explorer)
+    usage_recorder.start()
+    yield
+    await cache_warmer.stop()
+    await usage_recorder.stop()
+    if router is not None:
+        await router.stop()
+    await log_pipeline.stop()
+
+
+app = FastAPI(title="ScanRole API", version="1.0.0", lifespan=lifespan)
 
 COUNTRY_ISO_MAP = {
     "US": "United States",
@@ -47,6 +177,8 @@ SORT_WHITELIST = {
 DEFAULT_SORT_BY = "jobs_current"
 DEFAULT_SORT_DIR = "desc"
 PAGE_SIZE_ALLOWED = {10, 25, 50, 100}
+PERIODS_ALLOWED = (7, 30, 90)
+GROUP_BY_ALLOWED = {"state", "country"}
 
 allowed_origins = [settings.api_base_url] if settings.api_base_url else ["*"]
 app.add_middleware(
@@ -82,8 +214,17 @@ async def http_exception_handler(_, exc: HTTPException):
     )
 
 
-def _error_response(code: str, message: str, status_code: int):
-    return JSONResponse(status_code=status_code, content={"error": {"code": code, "message": message}})
+@app.exception_handler(QueryCancelled)
+async def query_cancelled_handler(_, exc: QueryCancelled):
+    return _error_response("TIMEOUT", str(exc), 504)
+
+
+def _error_response(code: str, message: str, status_code: int, headers: Optional[dict] = None):
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": {"code": code, "message": message}},
+        headers=headers,
+    )
 
 
 def _rate_limit_response(limit: int, remaining: int, reset_ts: int, retry_after: int):
@@ -112,6 +253,55 @@ def _apply_limit(key: str, limit: int, window_seconds: int):
     return _rate_limit_response(limit, status.remaining, status.reset_ts, status.retry_after)
 
 
+@app.middleware("http")
+async def usage_middleware(request: Request, call_next):
+    response = await call_next(request)
+    # Only requests whose token passed require_scope are counted, keyed by the route template,
+    # so unauthenticated or unknown paths cannot add rows.
+    route = request.scope.get("route")
+    if (
+        getattr(request.state, "authorized", False)
+        and route is not None
+        and response.status_code not in (401, 403, 404)
+    ):
+        token_key, _ = extract_token_identifier(request.headers.get("authorization"))
+        if token_key:
+            usage_recorder.record(token_key, route.path)
+    return response
+
+
+@app.middleware("http")
+async def admission_middleware(request: Request, call_next):
+    path = request.url.path or ""
+    if (
+        not settings.admission_enabled
+        or request.method == "OPTIONS"
+        or not path.startswith("/api/v1/")
+    ):
+        return await call_next(request)
+
+    # Health, metadata and metrics get their own fixed lane so they stay responsive while
+    # data endpoints are being shed.
+    is_priority = path in ("/api/v1/health", "/api/v1/metrics") or path.startswith("/api/v1/meta/")
+    limiter = priority_limiter if is_priority else data_limiter
+    if not await limiter.acquire():
+        return _error_response(
+            "OVERLOADED",
+            "Server is busy, retry later",
+            503,
+            headers={"Retry-After": str(limiter.retry_after())},
+        )
+
+    started = time.monotonic()
+    failed = True
+    try:
+        response = await call_next(request)
+        failed = response.status_code >= 500
+        return response
+    finally:
+        limiter.release(time.monotonic() - started, failed)
+
+
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
     if not settings.rate_limit_enabled:
@@ -122,9 +312,11 @@ async def rate_limit_middleware(request: Request, call_next):
     path = request.url.path or ""
     is_health = path == "/api/v1/health"
     is_meta = path.startswith("/api/v1/meta/")
-    is_role = path == "/api/v1/role-explorer"
+    is_role = path in ("/api/v1/role-explorer", "/api/v1/role-explorer/changes")
+    is_metrics = path == "/api/v1/metrics"
+    is_usage = path == "/api/v1/usage"
 
-    if not (is_health or is_meta or is_role):
+    if not (is_health or is_meta or is_role or is_metrics or is_usage):
         return await call_next(request)
 
     ip = extract_client_ip(request, settings.trust_proxy_headers)
@@ -144,6 +336,7 @@ async def rate_limit_middleware(request: Request, call_next):
         )
         if response:
             rate_limit_logger.warning(
+                (token_prefix, "minute"),
                 "Rate limit exceeded token=%s ip=%s path=%s window=minute",
                 token_prefix,
                 ip,
@@ -158,6 +351,7 @@ async def rate_limit_middleware(request: Request, call_next):
             )
             if response:
                 rate_limit_logger.warning(
+                    (token_prefix, "day"),
                     "Rate limit exceeded token=%s ip=%s path=%s window=day",
                     token_prefix,
                     ip,
@@ -172,6 +366,7 @@ async def rate_limit_middleware(request: Request, call_next):
     )
     if response:
         rate_limit_logger.warning(
+            (ip, "minute"),
             "Rate limit exceeded ip=%s path=%s window=minute",
             ip,
             path,
@@ -186,6 +381,7 @@ async def rate_limit_middleware(request: Request, call_next):
         )
         if response:
             rate_limit_logger.warning(
+                (ip, "day"),
                 "Rate limit exceeded ip=%s path=%s window=day",
                 ip,
                 path,
@@ -194,6 +390,47 @@ async def rate_limit_middleware(request: Request, call_next):
 
     return await call_next(request)
 
+
+@app.middleware("http")
+async def access_log_middleware(request: Request, call_next):
+    if not settings.access_log_enabled:
+        return await call_next(request)
+    started = time.monotonic()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        ip = extract_client_ip(request, settings.trust_proxy_headers)
+        _, token_prefix = extract_token_identifier(request.headers.get("authorization"))
+        fields = {
+            "method": request.method,
+            "path": request.url.path,
+            "status": status_code,
+            "duration_ms": round((time.monotonic() - started) * 1000, 2),
+            "ip": ip,
+            "token": token_prefix,
+        }
+        if status_code in (429, 503):
+            # Rejections are what floods look like; keep their log volume bounded per client.
+            access_rejection_logger.log((status_code, ip), logging.INFO, "request", fields=fields)
+        else:
+            access_logger.info("request", extra={"fields": fields})
+
+
+async def _kill_abandoned(connections) -> None:
+    await run_in_threadpool(kill_queries, connections)
+
+
+# Added last so it wraps every other layer and sees the server's receive channel directly.
+app.add_middleware(
+    DisconnectMiddleware,
+    timeout_seconds=settings.query_deadline_ms / 1000,
+    on_disconnect=_kill_abandoned,
+)
+
+
 def _normalize_country(value: Optional[str]) -> Optional[str]:
     if not value:
         return None
@@ -251,15 +488,85 @@ async def health():
     return {"status": "ok"}
 
 
+@app.get("/api/v1/metrics")
+async def metrics(_auth=Depends(require_metrics)):
+    router = get_read_router()
+    return {
+        "role_explorer_single_flight": role_explorer_flights.stats(),
+        "cache_warming": cache_warmer.stats(),
+        "snapshots": role_explorer_snapshots.stats(),
+        "shared_cache": shared_cache.stats() if shared_cache else None,
+        "logging": log_pipeline.stats(),
+        "location_memo": location_memo_stats(),
+        "admission": {"data": data_limiter.stats(), "priority": priority_limiter.stats()},
+        "read_replicas": router.stats() if router else [],
+    }
+
+
+def request_scope(request: Request) -> RequestScope:
+    scope = request.scope.get("state", {}).get("request_scope")
+    return scope if scope is not None else RequestScope(settings.query_deadline_ms / 1000)
+
+
+async def _run_query(scope: RequestScope, fn, *args):
+    # Reads outside _shared get a budget of their own on the request's scope, so the deadline,
+    # the execution-time hint and the disconnect KILL apply to them as well.
+    budget = QueryBudget(settings.query_deadline_ms / 1000)
+    budget.attach(scope)
+    try:
+        return await asyncio.wait_for(
+            run_in_threadpool(run_with_budget, budget, fn, *args), max(0.0, scope.remaining())
+        )
+    except asyncio.TimeoutError:
+        raise QueryCancelled("Query deadline exceeded") from None
+
+
+def _usage_window(key: str, limit: int, window_seconds: int) -> dict:
+    if limit <= 0:
+        return {"used": None, "limit": None, "remaining": None, "reset": None}
+    current = rate_limit_store.peek(key, limit, window_seconds)
+    return {
+        "used": limit - current.remaining,
+        "limit": limit,
+        "remaining": current.remaining,
+        "reset": current.reset_ts,
+    }
+
+
+@app.get("/api/v1/usage")
+async def usage(
+    request: Request,
+    days: int = Query(30, ge=1, le=90),
+    _auth=Depends(require_role_explorer),
+    scope: RequestScope = Depends(request_scope),
+):
+    token_key, token_prefix = extract_token_identifier(request.headers.get("authorization"))
+    if not token_key:
+        return _error_response("UNAUTHORIZED", "Missing token", status.HTTP_401_UNAUTHORIZED)
+    history = await _run_query(scope, usage_recorder.history, token_key, days)
+    return {
+        "token": token_prefix,
+        "current": {
+            "minute": _usage_window(
+                f"{token_key}:minute", settings.rate_limit_token_per_minute, 60
+            ),
+            "day": _usage_window(f"{token_key}:day", settings.rate_limit_token_per_day, 86400),
+        },
+        "history": history,
+    }
+
+
 @app.get("/api/v1/meta/periods")
 async def meta_periods():
     return {"items": [7, 30, 90]}
 
 
 @app.get("/api/v1/meta/countries")
-async def meta_countries(_auth=Depends(require_role_explorer)):
+async def meta_countries(
+    _auth=Depends(require_role_explorer), scope: RequestScope = Depends(request_scope)
+):
     table_name = settings.role_table
-    countries = get_countries(table_name)
+    countries = await _run_query(scope, get_countries, table_name)
     iso_items = []
     for country in countries:
         iso = _country_to_iso(country)
@@ -269,22 +576,481 @@ async def meta_countries(_auth=Depends(require_role_explorer)):
 
 
 @app.get("/api/v1/meta/states")
-async def meta_states(country: str = Query(..., min_length=2), _auth=Depends(require_role_explorer)):
+async def meta_states(
+    country: str = Query(..., min_length=2),
+    _auth=Depends(require_role_explorer),
+    scope: RequestScope = Depends(request_scope),
+):
     table_name = settings.role_table
     normalized = _normalize_country(country)
     country_name = _iso_to_country(normalized) if normalized else None
-    return {"items": get_states_by_country(table_name, country_name)}
+    return {"items": await _run_query(scope, get_states_by_country, table_name, country_name)}
 
 
 @app.get("/api/v1/meta/roles")
-async def meta_roles(_auth=Depends(require_role_explorer)):
+async def meta_roles(
+    _auth=Depends(require_role_explorer), scope: RequestScope = Depends(request_scope)
+):
     table_name = settings.role_table
-    return {"items": get_roles(table_name)}
+    return {"items": await _run_query(scope, get_roles, table_name)}
+
+
+def _build_role_row(
+    table_name: str,
+    role_name: str,
+    end_date,
+    period_days: int,
+    country_name: Optional[str],
+    state: Optional[str],
+) -> dict:
+    end_day = to_date(end_date)
+    start = (end_day - timedelta(days=period_days - 1)).strftime("%Y-%m-%d")
+    end_str = end_day.strftime("%Y-%m-%d")
+    prev_end = (end_day - timedelta(days=period_days)).strftime("%Y-%m-%d")
+    prev_start = (end_day - timedelta(days=period_days * 2 - 1)).strftime("%Y-%m-%d")
+
+    current = get_metrics(table_name, role_name, start, end_str, country_name, state)
+    previous = get_metrics(table_name, role_name, prev_start, prev_end, country_name, state)
+    return _role_row(role_name, country_name, state, current, previous)
+
+
+def _build_role_rows(
+    table_name: str,
+    role_end_dates: dict,
+    period_days: int,
+    country_name: Optional[str],
+    state: Optional[str],
+) -> list:
+    rows = []
+    for role_name, end_date in role_end_dates.items():
+        check_budget()
+        rows.append(
+            _build_role_row(table_name, role_name, end_date, period_days, country_name, state)
+        )
+    return rows
+
+
+def _build_grouped_rows(
+    table_name: str,
+    group_by: str,
+    period_days: int,
+    country_name: Optional[str],
+    state: Optional[str],
+    role: Optional[str],
+) -> list:
+    groups = get_grouped_metrics(table_name, group_by, period_days, country_name, state, role)
+    return [
+        _role_row(
+            group["role"], group["country"], group["state"], group["current"], group["previous"]
+        )
+        for group in groups
+        if role == "Other" or group["role"] != "Other"
+    ]
+
+
+def _build_multi_period_rows(
+    table_name: str,
+    periods: tuple,
+    country_name: Optional[str],
+    state: Optional[str],
+    role: Optional[str],
+) -> dict:
+    metrics_by_role = get_multi_period_metrics(table_name, list(periods), country_name, state, role)
+    rows = {period: [] for period in periods}
+    for role_name, windows in metrics_by_role.items():
+        if role != "Other" and role_name == "Other":
+            continue
+        for period, (current, previous) in windows.items():
+            rows[period].append(_role_row(role_name, country_name, state, current, previous))
+    return rows
+
+
+async def _shared(key: tuple, version: Optional[str], fn, *args):
+    cache_key = key + (version,)
+    if version is not None:
+        cached = role_explorer_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        if shared_cache is not None:
+            cached = shared_cache.get(cache_key)
+            if cached is not None:
+                role_explorer_cache.set(cache_key, cached)
+                return cached
+
+    # Every request sharing a computation attaches to its budget; the queries are only
+    # killed once all of them have disconnected. Background warming pins the budget.
+    scope = current_scope.get()
+    budget = role_explorer_budgets.get(cache_key)
+    if budget is None or budget.cancelled:
+        # A cancelled budget belongs to a computation all of its callers abandoned; a live
+        # request starts a fresh one instead of inheriting the cancellation.
+        budget = QueryBudget(
+            settings.query_deadline_ms / 1000, pinned=scope is None, min_version=version
+        )
+        role_explorer_budgets[cache_key] = budget
+    if scope is not None:
+        budget.attach(scope)
+
+    def compute():
+        result = run_with_budget(budget, fn, *args)
+        if version is not None and shared_cache is not None:
+            # Encoding, compression and the writer flock stay off the event loop.
+            shared_cache.set(cache_key, result, settings.role_explorer_cache_ttl_seconds)
+        return result
+
+    async def run():
+        try:
+            return await run_in_threadpool(compute)
+        finally:
+            if role_explorer_budgets.get(cache_key) is budget:
+                del role_explorer_budgets[cache_key]
+
+    flight = role_explorer_flights.do((cache_key, id(budget)), run)
+    if scope is None:
+        result = await flight
+    else:
+        try:
+            result = await asyncio.wait_for(flight, max(0.0, scope.remaining()))
+        except asyncio.TimeoutError:
+            raise QueryCancelled("Query deadline exceeded") from None
+    if version is not None and role_explorer_cache.get(cache_key) is None:
+        role_explorer_cache.set(cache_key, result)
+    return result
+
+
+async def _load_grouped_rows(group_by, period_days, country_name, state, role, version) -> list:
+    return await _shared(
+        ("grouped", settings.role_table, group_by, period_days, country_name, state, role),
+        version,
+        _build_grouped_rows,
+        settings.role_table,
+        group_by,
+        period_days,
+        country_name,
+        state,
+        role,
+    )
+
+
+async def _load_role_end_dates(country_name, state, role, version) -> dict:
+    return await _shared(
+        ("end_dates", settings.role_table, country_name, state, role),
+        version,
+        get_role_end_dates,
+        settings.role_table,
+        country_name,
+        state,
+        role,
+    )
+
+
+def _eligible_end_dates(role_end_dates: dict, role: Optional[str]) -> dict:
+    return {
+        role_name: end_date
+        for role_name, end_date in role_end_dates.items()
+        if end_date and (role == "Other" or role_name != "Other")
+    }
+
+
+async def _load_role_rows(
+    role_end_dates, period_days, country_name, state, role, version, page_roles=None
+):
+    selected = role_end_dates
+    if page_roles is not None:
+        selected = {name: role_end_dates[name] for name in page_roles}
+    return await _shared(
+        ("rows", settings.role_table, period_days, country_name, state, role, page_roles),
+        version,
+        _build_role_rows,
+        settings.role_table,
+        selected,
+        period_days,
+        country_name,
+        state,
+    )
+
+
+async def _load_multi_period_rows(periods, country_name, state, role, version) -> dict:
+    return await _shared(
+        ("multi_period", settings.role_table, periods, country_name, state, role),
+        version,
+        _build_multi_period_rows,
+        settings.role_table,
+        periods,
+        country_name,
+        state,
+        role,
+    )
+
+
+async def _load_last_update(country_name, state, version):
+    return await _shared(
+        ("last_update", settings.role_table, country_name, state),
+        version,
+        get_last_update,
+        settings.role_table,
+        country_name,
+        state,
+    )
+
+
+def _check_data_version_source() -> None:
+    global data_version_source
+    table_name, column = data_version_source
+    try:
+        found = has_column(table_name, column)
+    except MySQLError as exc:
+        data_version_logger.warning(
+            "Could not check data version column %s.%s: %s", table_name, column, exc
+        )
+        return
+    if not found:
+        data_version_logger.error(
+            "DATA_VERSION_COLUMN %s does not exist in %s; falling back to MAX(date_posted) of"
+            " %s, which misses same-day inserts and in-place updates",
+            column,
+            table_name,
+            settings.role_table,
+        )
+        data_version_source = (settings.role_table, "date_posted")
+
+
+def _probe_data_version(conn) -> Optional[str]:
+    return read_data_version(conn, *data_version_source)
+
+
+async def _load_data_version() -> Optional[str]:
+    router = get_read_router()
+    if router is not None:
+        # The newest version a healthy replica has reached, as seen by the background checks;
+        # computations for it are only routed to replicas that have caught up.
+        version = router.newest_version()
+        if version is not None:
+            return version
+    return await run_in_threadpool(get_data_version, *data_version_source)
+
+
+async def _remember_snapshot(view: tuple, version: Optional[str], rows: list) -> None:
+    if version is not None and not role_explorer_snapshots.has(view, version):
+        # put() also publishes to the shared cache, which encodes and takes the writer flock.
+        await run_in_threadpool(role_explorer_snapshots.put, view, version, rows)
+
+
+async def _load_view_rows(view: tuple, version: Optional[str]) -> list:
+    period_days, country_name, state, role, group_by = view
+    if group_by:
+        rows = await _load_grouped_rows(group_by, period_days, country_name, state, role, version)
+    else:
+        role_end_dates = _eligible_end_dates(
+            await _load_role_end_dates(country_name, state, role, version), role
+        )
+        rows = await _load_role_rows(
+            role_end_dates, period_days, country_name, state, role, version
+        )
+    await _remember_snapshot(view, version, rows)
+    return rows
+
+
+_snapshot_tasks: set = set()
+
+
+def _remember_snapshot_later(view: tuple, version: Optional[str]) -> None:
+    # Paths that only compute one page record the full view in the background, so a later
+    # /changes request can still diff against this version.
+    if version is None or role_explorer_snapshots.has(view, version):
+        return
+
+    async def load() -> None:
+        # Not tied to the request: a disconnect must not cancel the shared computation.
+        current_scope.set(None)
+        try:
+            await _load_view_rows(view, version)
+        except Exception:
+            snapshot_logger.exception("Snapshot failed view=%s version=%s", view, version)
+
+    task = asyncio.create_task(load())
+    _snapshot_tasks.add(task)
+    task.add_done_callback(_snapshot_tasks.discard)
+
+
+async def _warm_role_explorer(view: tuple, version: str) -> None:
+    period_days, country_name, state, role, group_by = view
+    if isinstance(period_days, tuple):
+        # period_days=7,30,90 requests are recorded as one view and computed in one scan.
+        if group_by:
+            for period in period_days:
+                await _load_view_rows((period,) + view[1:], version)
+        else:
+            rows_by_period = await _load_multi_period_rows(
+                period_days, country_name, state, role, version
+            )
+            for period in period_days:
+                await _remember_snapshot(
+                    (period,) + view[1:], version, rows_by_period.get(period) or []
+                )
+    else:
+        await _load_view_rows(view, version)
+    await _load_last_update(country_name, state, version)
+
+
+def _float_or_none(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _percent_or_none(value) -> Optional[float]:
+    return float(value) * 100 if value is not None else None
+
+
+def _role_row(
+    role_name: str,
+    country_name: Optional[str],
+    state: Optional[str],
+    current: dict,
+    previous: dict,
+) -> dict:
+    jobs_current = int(current.get("jobs_count") or 0)
+    jobs_prev = int(previous.get("jobs_count") or 0)
+    jobs_delta_abs, jobs_delta_pct, jobs_trend = compute_delta(jobs_current, jobs_prev)
+
+    salary_current = _float_or_none(current.get("avg_salary"))
+    salary_prev = _float_or_none(previous.get("avg_salary"))
+    salary_delta_abs, salary_delta_pct, salary_trend = compute_delta(
+        salary_current or 0, salary_prev or 0
+    )
+
+    remote_current = _percent_or_none(current.get("remote_share"))
+    remote_prev = _percent_or_none(previous.get("remote_share"))
+    remote_delta_abs, remote_delta_pct, remote_trend = compute_delta(
+        remote_current or 0, remote_prev or 0
+    )
+
+    confidence_current = _float_or_none(current.get("avg_confidence"))
+    seniority_counts = {
+        "Junior": int(current.get("junior_count") or 0),
+        "Mid": int(current.get("mid_count") or 0),
+        "Senior": int(current.get("senior_count") or 0),
+        "Staff": int(current.get("staff_count") or 0),
+        "Principal": int(current.get("principal_count") or 0),
+    }
+
+    return {
+        "role": role_name,
+        "country": country_name,
+        "state": state,
+        "jobs_current": jobs_current,
+        "jobs_prev": jobs_prev,
+        "jobs_delta_pct": jobs_delta_pct,
+        "jobs_trend": jobs_trend,
+        "salary_current": salary_current,
+        "salary_prev": salary_prev,
+        "salary_delta_pct": salary_delta_pct,
+        "salary_trend": salary_trend,
+        "remote_current": remote_current,
+        "remote_prev": remote_prev,
+        "remote_delta_pp": remote_delta_abs,
+        "remote_trend": remote_trend,
+        "confidence_current": confidence_current,
+        "seniority_counts": seniority_counts,
+    }
+
+
+def _parse_periods(value: Optional[str]) -> Optional[tuple]:
+    if not value:
+        return (30,)
+    periods = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part.isdigit() or int(part) not in PERIODS_ALLOWED:
+            return None
+        if int(part) not in periods:
+            periods.append(int(part))
+    return tuple(periods) if periods else None
+
+
+def _empty_role_explorer() -> dict:
+    return {
+        "as_of_date": None,
+        "total": 0,
+        "items": [],
+        "next_cursor": None,
+    }
+
+
+async def _multi_period_response(
+    periods: tuple,
+    country_name: Optional[str],
+    state: Optional[str],
+    role: Optional[str],
+    group_by: Optional[str],
+    sort_by: str,
+    sort_dir: str,
+    offset: int,
+    page_size: int,
+    version: Optional[str],
+) -> dict:
+    cache_warmer.record((periods, country_name, state, role, group_by))
+    if group_by:
+        rows_by_period = {
+            period: await _load_grouped_rows(group_by, period, country_name, state, role, version)
+            for period in periods
+        }
+    else:
+        rows_by_period = await _load_multi_period_rows(periods, country_name, state, role, version)
+
+    def order_key(row):
+        return sort_key(row, sort_by, sort_dir)
+
+    results = {}
+    for period in periods:
+        rows = rows_by_period.get(period) or []
+        await _remember_snapshot((period, country_name, state, role, group_by), version, rows)
+        selected = select_page(rows, order_key, page_size + 1, offset)
+        items = selected[:page_size]
+        has_more = len(selected) > page_size
+        results[str(period)] = {
+            "total": len(rows),
+            "items": items,
+            "next_cursor": encode_cursor(items[-1], sort_by, sort_dir) if has_more else None,
+        }
+
+    last_update = await _load_last_update(country_name, state, version)
+    return {
+        "as_of_date": last_update if any(result["total"] for result in results.values()) else None,
+        "data_version": version,
+        "periods": results,
+        "applied_sort_by": sort_by,
+        "applied_sort_dir": sort_dir,
+    }
+
+
+def _columnar_response(response: dict, output_format: str, periods: tuple) -> Response:
+    metadata = {
+        "as_of_date": response.get("as_of_date"),
+        "data_version": response.get("data_version"),
+        "applied_sort_by": response.get("applied_sort_by"),
+        "applied_sort_dir": response.get("applied_sort_dir"),
+    }
+    if "periods" in response:
+        rows, row_periods = [], []
+        for period, result in response["periods"].items():
+            rows.extend(result["items"])
+            row_periods.extend([int(period)] * len(result["items"]))
+            metadata[f"total:{period}"] = result["total"]
+            metadata[f"next_cursor:{period}"] = result["next_cursor"]
+    else:
+        rows = response["items"]
+        row_periods = [periods[0]] * len(rows)
+        metadata["total"] = response["total"]
+        metadata["next_cursor"] = response["next_cursor"]
+    table = role_rows_table(rows, row_periods, metadata)
+    return Response(
+        content=encode_table(table, output_format), media_type=MEDIA_TYPES[output_format]
+    )
 
 
 @app.get("/api/v1/role-explorer")
 async def role_explorer(
-    period_days: int = Query(30, ge=7, le=90),
+    period_days: Optional[str] = Query(None),
     country: Optional[str] = None,
     state: Optional[str] = None,
     role: Optional[str] = None,
@@ -294,12 +1060,24 @@ async def role_explorer(
     debug: Optional[bool] = Query(False),
     page: int = Query(1, ge=1),
     page_size: int = Query(25, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    group_by: Optional[str] = Query(None),
+    output_format: str = Query("json", alias="format"),
+    scope: RequestScope = Depends(request_scope),
     _auth=Depends(require_role_explorer),
 ):
-    if period_days not in (7, 30, 90):
+    periods = _parse_periods(period_days)
+    if periods is None:
         return _error_response("VALIDATION_ERROR", "Invalid period_days", 400)
+    if group_by and group_by not in GROUP_BY_ALLOWED:
+        return _error_response("VALIDATION_ERROR", "Invalid group_by", 400)
+    if len(periods) > 1 and cursor:
+        return _error_response("VALIDATION_ERROR", "cursor requires a single period_days", 400)
+    if output_format not in FORMATS:
+        return _error_response("VALIDATION_ERROR", "Invalid format", 400)
+    if output_format != "json" and not arrow_available():
+        return _error_response("FORMAT_UNAVAILABLE", f"format={output_format} is not enabled", 501)
 
-    table_name = settings.role_table
     country_iso = _normalize_country(country) if country else None
     country_name = _iso_to_country(country_iso) if country_iso else None
     state = state or None
@@ -309,99 +1087,92 @@ async def role_explorer(
 
     sort_by, sort_dir = _normalize_sort(sort_by, sort_dir, sort)
 
-    role_end_dates = get_role_end_dates(table_name, country_name, state, role)
-    if not role_end_dates:
-        return {
-            "as_of_date": None,
-            "total": 0,
-            "items": [],
-        }
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, sort_by, sort_dir)
+        except InvalidCursor as exc:
+            return _error_response("VALIDATION_ERROR", f"Invalid cursor: {exc}", 400)
+    offset = 0 if cursor else (page - 1) * page_size
 
-    rows = []
-    for role_name, end_date in role_end_dates.items():
-        if not end_date:
-            continue
-        if isinstance(end_date, datetime):
-            end_day = end_date.date()
-        elif isinstance(end_date, date):
-            end_day = end_date
-        else:
-            end_day = datetime.strptime(str(end_date), "%Y-%m-%d").date()
-
-        start = (end_day - timedelta(days=period_days - 1)).strftime("%Y-%m-%d")
-        end_str = end_day.strftime("%Y-%m-%d")
-        prev_end = (end_day - timedelta(days=period_days)).strftime("%Y-%m-%d")
-        prev_start = (end_day - timedelta(days=period_days * 2 - 1)).strftime("%Y-%m-%d")
-
-        current = get_metrics(table_name, role_name, start, end_str, country_name, state)
-        previous = get_metrics(table_name, role_name, prev_start, prev_end, country_name, state)
-
-        jobs_current = int(current.get("jobs_count") or 0)
-        jobs_prev = int(previous.get("jobs_count") or 0)
-        jobs_delta_abs, jobs_delta_pct, jobs_trend = compute_delta(jobs_current, jobs_prev)
-
-        salary_current = float(current["avg_salary"]) if current.get("avg_salary") is not None else None
-        salary_prev = float(previous["avg_salary"]) if previous.get("avg_salary") is not None else None
-        salary_delta_abs, salary_delta_pct, salary_trend = compute_delta(salary_current or 0, salary_prev or 0)
-
-        remote_current = (float(current["remote_share"]) * 100) if current.get("remote_share") is not None else None
-        remote_prev = (float(previous["remote_share"]) * 100) if previous.get("remote_share") is not None else None
-        remote_delta_abs, remote_delta_pct, remote_trend = compute_delta(remote_current or 0, remote_prev or 0)
-
-        confidence_current = float(current["avg_confidence"]) if current.get("avg_confidence") is not None else None
-        seniority_counts = {
-            "Junior": int(current.get("junior_count") or 0),
-            "Mid": int(current.get("mid_count") or 0),
-            "Senior": int(current.get("senior_count") or 0),
-            "Staff": int(current.get("staff_count") or 0),
-            "Principal": int(current.get("principal_count") or 0),
-        }
+    def order_key(row):
+        return sort_key(row, sort_by, sort_dir)
 
-        rows.append(
-            {
-                "role": role_name,
-                "country": country_name,
-                "state": state,
-                "jobs_current": jobs_current,
-                "jobs_prev": jobs_prev,
-                "jobs_delta_pct": jobs_delta_pct,
-                "jobs_trend": jobs_trend,
-                "salary_current": salary_current,
-                "salary_prev": salary_prev,
-                "salary_delta_pct": salary_delta_pct,
-                "salary_trend": salary_trend,
-                "remote_current": remote_current,
-                "remote_prev": remote_prev,
-                "remote_delta_pp": remote_delta_abs,
-                "remote_trend": remote_trend,
-                "confidence_current": confidence_current,
-                "seniority_counts": seniority_counts,
-            }
+    def respond(response: dict):
+        if output_format == "json":
+            return response
+        return _columnar_response(response, output_format, periods)
+
+    current_scope.set(scope)
+    version = cache_warmer.data_version
+    if len(periods) > 1:
+        response = await _multi_period_response(
+            periods,
+            country_name,
+            state,
+            role,
+            group_by,
+            sort_by,
+            sort_dir,
+            offset,
+            page_size,
+            version,
         )
+        return respond(response)
+
+    period_days = periods[0]
+    view = (period_days, country_name, state, role, group_by)
+    cache_warmer.record(view)
+
+    rows = None
+    if group_by:
+        rows = await _load_grouped_rows(group_by, period_days, country_name, state, role, version)
+        if not rows:
+            return respond(_empty_role_explorer())
+        await _remember_snapshot(view, version, rows)
+    else:
+        role_end_dates = await _load_role_end_dates(country_name, state, role, version)
+        if not role_end_dates:
+            return respond(_empty_role_explorer())
+        role_end_dates = _eligible_end_dates(role_end_dates, role)
+
+        if sort_by in TIE_BREAK_FIELDS:
+            # country/state are the same for every row, so the order only depends on the role
+            # name: pick the page first and compute metrics for those roles only.
+            candidates = [
+                {"role": role_name, "country": country_name, "state": state}
+                for role_name in role_end_dates
+            ]
+            total = len(candidates)
+            selected = select_page(candidates, order_key, page_size + 1, offset, after)
+            has_more = len(selected) > page_size
+            page_roles = tuple(row["role"] for row in selected[:page_size])
+            items = await _load_role_rows(
+                role_end_dates, period_days, country_name, state, role, version, page_roles
+            )
+            _remember_snapshot_later(view, version)
+        else:
+            rows = await _load_role_rows(
+                role_end_dates, period_days, country_name, state, role, version
+            )
+            await _remember_snapshot(view, version, rows)
 
-    if role != "Other":
-        rows = [row for row in rows if row["role"] != "Other"]
-
-    rows.sort(key=lambda r: (r.get("role") or "", r.get("country") or "", r.get("state") or ""))
-
-    def primary_key(row):
-        value = row.get(sort_by)
-        if value is None:
-            return (1, None)
-        return (0, value)
-
-    rows.sort(key=primary_key, reverse=sort_dir == "desc")
+    if rows is not None:
+        total = len(rows)
+        rows = select_page(rows, order_key, page_size + 1, offset, after)
+        has_more = len(rows) > page_size
+        items = rows[:page_size]
 
-    total = len(rows)
-    offset = (page - 1) * page_size
-    items = rows[offset : offset + page_size]
+    next_cursor = encode_cursor(items[-1], sort_by, sort_dir) if has_more else None
 
-    last_update = get_last_update(table_name, country_name, state)
+    last_update = await _load_last_update(country_name, state, version)
 
     response = {
         "as_of_date": last_update,
         "total": total,
         "items": items,
+        "next_cursor": next_cursor,
+        "data_version": version,
         "applied_sort_by": sort_by,
         "applied_sort_dir": sort_dir,
     }
@@ -409,4 +1180,57 @@ async def role_explorer(
     if debug:
         response["debug_sort_key"] = f"{sort_by}:{sort_dir}"
 
-    return response
+    return respond(response)
+
+
+def _changes_response(
+    version: Optional[str], since: Optional[str], full: bool, changed: list, removed: list
+) -> dict:
+    return {
+        "data_version": version,
+        "since": since,
+        "full": full,
+        "changed": changed,
+        "removed": removed,
+    }
+
+
+@app.get("/api/v1/role-explorer/changes")
+async def role_explorer_changes(
+    since: str = Query(..., min_length=1),
+    period_days: int = Query(30, ge=7, le=90),
+    country: Optional[str] = None,
+    state: Optional[str] = None,
+    role: Optional[str] = None,
+    group_by: Optional[str] = Query(None),
+    scope: RequestScope = Depends(request_scope),
+    _auth=Depends(require_role_explorer),
+):
+    if period_days not in (7, 30, 90):
+        return _error_response("VALIDATION_ERROR", "Invalid period_days", 400)
+    if group_by and group_by not in GROUP_BY_ALLOWED:
+        return _error_response("VALIDATION_ERROR", "Invalid group_by", 400)
+
+    country_iso = _normalize_country(country) if country else None
+    country_name = _iso_to_country(country_iso) if country_iso else None
+    state = state or None
+    role = role or None
+
+    current_scope.set(scope)
+    version = cache_warmer.data_version or await _load_data_version()
+    view = (period_days, country_name, state, role, group_by)
+    rows = await _load_view_rows(view, version)
+    if version is None:
+        # Without a data version nothing can be diffed: send the full view.
+        return _changes_response(None, since, True, rows, [])
+    if since == version:
+        return _changes_response(version, since, False, [], [])
+
+    previous = role_explorer_snapshots.get(view, since)
+    current = role_explorer_snapshots.get(view, version)
+    if previous is None or current is None:
+        # The requested version is no longer retained: the client has to resync.
+        return _changes_response(version, since, True, rows, [])
+
+    changed, removed = diff_snapshots(previous, current)
+    return _changes_response(version, since, False, changed, removed)
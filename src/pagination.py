@@ -0,0 +1,93 @@
+import base64
+import binascii
+import heapq
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+TIE_BREAK_FIELDS = ("role", "country", "state")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class _Descending:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+    def __gt__(self, other: "_Descending") -> bool:
+        return self.value < other.value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+
+def _order_key(
+    value: Any,
+    role: Optional[str],
+    country: Optional[str],
+    state: Optional[str],
+    sort_dir: str,
+) -> Tuple:
+    # Mirrors the previous two-pass sort: ties are broken by role/country/state ascending,
+    # nulls go last for asc and first for desc.
+    tie = (role or "", country or "", state or "")
+    if value is None:
+        return (0 if sort_dir == "desc" else 1, 0) + tie
+    if sort_dir == "desc":
+        return (1, _Descending(value)) + tie
+    return (0, value) + tie
+
+
+def sort_key(row: Dict, sort_by: str, sort_dir: str) -> Tuple:
+    return _order_key(
+        row.get(sort_by), row.get("role"), row.get("country"), row.get("state"), sort_dir
+    )
+
+
+def select_page(
+    rows: Iterable[Dict],
+    key: Callable[[Dict], Tuple],
+    limit: int,
+    offset: int = 0,
+    after: Optional[Tuple] = None,
+) -> List[Dict]:
+    if after is not None:
+        rows = (row for row in rows if after < key(row))
+    return heapq.nsmallest(offset + limit, rows, key=key)[offset:]
+
+
+def encode_cursor(row: Dict, sort_by: str, sort_dir: str) -> str:
+    payload = {
+        "s": sort_by,
+        "d": sort_dir,
+        "v": row.get(sort_by),
+        "k": [row.get(field) for field in TIE_BREAK_FIELDS],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_dir: str) -> Tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        value = payload["v"]
+        role, country, state = payload["k"]
+        cursor_sort_by = payload["s"]
+        cursor_sort_dir = payload["d"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if cursor_sort_by != sort_by or cursor_sort_dir != sort_dir:
+        raise InvalidCursor("Cursor does not match sort order")
+    expected = (str,) if sort_by in TIE_BREAK_FIELDS else (int, float)
+    if value is not None and (isinstance(value, bool) or not isinstance(value, expected)):
+        raise InvalidCursor("Malformed cursor")
+    if not all(part is None or isinstance(part, str) for part in (role, country, state)):
+        raise InvalidCursor("Malformed cursor")
+    return _order_key(value, role, country, state, sort_dir)
@@ -1,63 +1,69 @@
+from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
-from db import get_connection
-
-
-US_STATE_MAP = {
-    "AL": "Alabama",
-    "AK": "Alaska",
-    "AZ": "Arizona",
-    "AR": "Arkansas",
-    "CA": "California",
-    "CO": "Colorado",
-    "CT": "Connecticut",
-    "DE": "Delaware",
-    "FL": "Florida",
-    "GA": "Georgia",
-    "HI": "Hawaii",
-    "ID": "Idaho",
-    "IL": "Illinois",
-    "IN": "Indiana",
-    "IA": "Iowa",
-    "KS": "Kansas",
-    "KY": "Kentucky",
-    "LA": "Louisiana",
-    "ME": "Maine",
-    "MD": "Maryland",
-    "MA": "Massachusetts",
-    "MI": "Michigan",
-    "MN": "Minnesota",
-    "MS": "Mississippi",
-    "MO": "Missouri",
-    "MT": "Montana",
-    "NE": "Nebraska",
-    "NV": "Nevada",
-    "NH": "New Hampshire",
-    "NJ": "New Jersey",
-    "NM": "New Mexico",
-    "NY": "New York",
-    "NC": "North Carolina",
-    "ND": "North Dakota",
-    "OH": "Ohio",
-    "OK": "Oklahoma",
-    "OR": "Oregon",
-    "PA": "Pennsylvania",
-    "RI": "Rhode Island",
-    "SC": "South Carolina",
-    "SD": "South Dakota",
-    "TN": "Tennessee",
-    "TX": "Texas",
-    "UT": "Utah",
-    "VT": "Vermont",
-    "VA": "Virginia",
-    "WA": "Washington",
-    "WV": "West Virginia",
-    "WI": "Wisconsin",
-    "WY": "Wyoming",
-    "DC": "District of Columbia",
+from db import execute, get_read_connection
+from locations import US_STATE_MAP, resolve_location, resolve_locations
+
+SALARY_SQL = (
+    "CASE WHEN min_amount IS NOT NULL AND max_amount IS NOT NULL"
+    " THEN (min_amount + max_amount) / 2 "
+    " WHEN min_amount IS NOT NULL THEN min_amount "
+    " WHEN max_amount IS NOT NULL THEN max_amount "
+    " ELSE NULL END"
+)
+
+SENIORITY_COLUMNS = {
+    "Junior": "junior_count",
+    "Mid": "mid_count",
+    "Senior": "senior_count",
+    "Staff": "staff_count",
+    "Principal": "principal_count",
 }
 
 
+def partial_metrics_sql(condition: Optional[str] = None, prefix: str = "") -> str:
+    # Additive partial aggregates, optionally restricted to rows matching `condition`;
+    # combined with merge_partial_metrics into the same shape get_metrics returns.
+    def only(expr: str) -> str:
+        return f"CASE WHEN {condition} THEN {expr} END" if condition else expr
+
+    guard = f"{condition} AND " if condition else ""
+    columns = [
+        (
+            f"SUM(CASE WHEN {condition} THEN 1 ELSE 0 END)" if condition else "COUNT(*)",
+            "jobs_count",
+        ),
+        (f"SUM({only(SALARY_SQL)})", "salary_sum"),
+        (f"COUNT({only(SALARY_SQL)})", "salary_n"),
+        (f"SUM({only('is_remote')})", "remote_sum"),
+        (f"COUNT({only('is_remote')})", "remote_n"),
+        (f"SUM({only('role_confidence')})", "confidence_sum"),
+        (f"COUNT({only('role_confidence')})", "confidence_n"),
+    ]
+    for level, column in SENIORITY_COLUMNS.items():
+        columns.append((f"SUM(CASE WHEN {guard}seniority = '{level}' THEN 1 ELSE 0 END)", column))
+    return ", ".join(f"{expr} AS {prefix}{name}" for expr, name in columns)
+
+
+PARTIAL_SUM_FIELDS = (
+    "jobs_count",
+    "salary_sum",
+    "salary_n",
+    "remote_sum",
+    "remote_n",
+    "confidence_sum",
+    "confidence_n",
+) + tuple(SENIORITY_COLUMNS.values())
+
+
+def to_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value), "%Y-%m-%d").date()
+
+
 def _country_aliases(country: str) -> List[str]:
     if country == "United States":
         return ["United States", "US", "USA"]
@@ -109,9 +115,10 @@ def _append_location_filter(sql: str, params: List, country: Optional[str], stat
 
 
 def get_roles(table_name: str) -> List[str]:
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(
+            execute(
+                cur,
                 f"SELECT DISTINCT normalized_role FROM {table_name} "
                 "WHERE normalized_role IS NOT NULL AND normalized_role <> ''"
             )
@@ -121,86 +128,17 @@ def get_roles(table_name: str) -> List[str]:
     return roles
 
 
-def _parse_location_parts(location: str) -> Dict[str, Optional[str]]:
-    parts = [p.strip() for p in location.split(",")]
-    if len(parts) < 2:
-        return {"city": None, "state": None, "country": None}
-    city = parts[0]
-    state = None
-    country = None
-    if len(parts) >= 3:
-        last = parts[-1].upper()
-        prev = parts[-2].upper()
-        canada_provinces = {"AB","BC","MB","NB","NL","NS","NT","NU","ON","PE","QC","SK","YT"}
-        if last == "CA" and prev in canada_provinces:
-            state = parts[-2]
-            country = "Canada"
-        elif last in US_STATE_MAP:
-            state = parts[-1]
-            country = "United States"
-        else:
-            state = parts[-2]
-            country = _normalize_country_token(parts[-1])
-    else:
-        state = parts[-1]
-        country = _infer_country_from_state(state)
-        if country not in ("United States", None):
-            state = None
-    return {"city": city, "state": state, "country": country}
-
-
-def _normalize_country_token(token: Optional[str]) -> Optional[str]:
-    if not token:
-        return None
-    upper = token.upper()
-    if upper in {"US", "USA", "UNITED STATES"}:
-        return "United States"
-    if upper in {"UK", "GB", "UNITED KINGDOM"}:
-        return "United Kingdom"
-    if upper in {"CA", "CANADA"}:
-        return "Canada"
-    if upper in {"DE", "GERMANY"}:
-        return "Germany"
-    if upper in {"NL", "NE", "NETHERLANDS"}:
-        return "Netherlands"
-    if len(upper) == 2:
-        return None
-    return token
-
-
-def _infer_country_from_state(state: Optional[str]) -> Optional[str]:
-    if not state:
-        return None
-    upper = state.upper()
-    if upper in US_STATE_MAP or upper == "DC":
-        return "United States"
-    if upper in {"UK", "GB", "UNITED KINGDOM"}:
-        return "United Kingdom"
-    if upper == "CANADA":
-        return "Canada"
-    if upper == "GERMANY":
-        return "Germany"
-    if upper == "NETHERLANDS":
-        return "Netherlands"
-    return None
-
-
 def get_countries(table_name: str) -> List[str]:
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(
+            execute(
+                cur,
                 f"SELECT DISTINCT location FROM {table_name} "
                 "WHERE location IS NOT NULL AND location <> ''"
             )
             locations = [row["location"] for row in cur.fetchall()]
 
-    countries = {}
-    for location in locations:
-        parts = _parse_location_parts(location)
-        if parts["country"]:
-            countries[parts["country"]] = True
-        elif parts["state"] and parts["state"].upper() in US_STATE_MAP:
-            countries["United States"] = True
+    countries = {parsed.region_country for parsed in resolve_locations(locations)}
 
     allowed = ["United States", "Canada", "United Kingdom"]
     filtered = [c for c in allowed if c in countries]
@@ -211,23 +149,20 @@ def get_countries(table_name: str) -> List[str]:
 def get_states_by_country(table_name: str, country: str) -> List[str]:
     if not country:
         return []
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(
+            execute(
+                cur,
                 f"SELECT DISTINCT location FROM {table_name} "
                 "WHERE location IS NOT NULL AND location <> ''"
             )
             locations = [row["location"] for row in cur.fetchall()]
 
-    states: Dict[str, bool] = {}
-    for location in locations:
-        parts = _parse_location_parts(location)
-        country_token = parts["country"]
-        if country == "United States" and not country_token and parts["state"]:
-            if parts["state"].upper() in US_STATE_MAP:
-                states[parts["state"]] = True
-        elif country_token == country and parts["state"]:
-            states[parts["state"]] = True
+    states = {
+        parsed.state: True
+        for parsed in resolve_locations(locations)
+        if parsed.state and parsed.region_country == country
+    }
 
     state_list = list(states.keys())
     state_list.sort()
@@ -251,9 +186,9 @@ def get_role_end_dates(
         params.append(role)
     sql += " GROUP BY normalized_role"
 
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, params)
+            execute(cur, sql, params)
             rows = cur.fetchall()
 
     return {row["normalized_role"]: row["end_date"] for row in rows if row["normalized_role"]}
@@ -269,10 +204,7 @@ def get_metrics(
 ) -> Dict:
     sql = (
         "SELECT COUNT(*) AS jobs_count,"
-        " AVG(CASE WHEN min_amount IS NOT NULL AND max_amount IS NOT NULL THEN (min_amount + max_amount) / 2 "
-        " WHEN min_amount IS NOT NULL THEN min_amount "
-        " WHEN max_amount IS NOT NULL THEN max_amount "
-        " ELSE NULL END) AS avg_salary,"
+        f" AVG({SALARY_SQL}) AS avg_salary,"
         " AVG(CASE WHEN is_remote IS NULL THEN NULL ELSE is_remote END) AS remote_share,"
         " AVG(role_confidence) AS avg_confidence,"
         " SUM(CASE WHEN seniority = 'Junior' THEN 1 ELSE 0 END) AS junior_count,"
@@ -285,24 +217,310 @@ def get_metrics(
     params: List = [role, start_date, end_date]
     sql = _append_location_filter(sql, params, country, state)
 
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, params)
+            execute(cur, sql, params)
             row = cur.fetchone() or {}
     return row
 
 
+def get_location_end_dates(
+    table_name: str,
+    country: Optional[str],
+    state: Optional[str],
+    role: Optional[str],
+) -> List[Dict]:
+    sql = (
+        f"SELECT normalized_role, location, MAX(date_posted) AS end_date "
+        f"FROM {table_name} "
+        "WHERE date_posted IS NOT NULL AND location IS NOT NULL AND location <> ''"
+    )
+    params: List = []
+    sql = _append_location_filter(sql, params, country, state)
+    if role:
+        sql += " AND normalized_role = %s"
+        params.append(role)
+    sql += " GROUP BY normalized_role, location"
+
+    with get_read_connection() as conn:
+        with conn.cursor() as cur:
+            execute(cur, sql, params)
+            return [row for row in cur.fetchall() if row["normalized_role"]]
+
+
+def _window_sql(newest_offset: int, oldest_offset: int) -> str:
+    return (
+        f"t.date_posted BETWEEN DATE_SUB(DATE(e.end_date), INTERVAL {oldest_offset} DAY)"
+        f" AND DATE_SUB(DATE(e.end_date), INTERVAL {newest_offset} DAY)"
+    )
+
+
+GROUP_BATCH_ROWS = 500
+
+
+def _insert_rows(cur, table: str, columns: Tuple[str, ...], rows: List[Tuple]) -> None:
+    # Multi-row INSERTs of at most GROUP_BATCH_ROWS rows, so no statement grows with the
+    # number of distinct locations.
+    row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    for start in range(0, len(rows), GROUP_BATCH_ROWS):
+        batch = rows[start : start + GROUP_BATCH_ROWS]
+        params = [value for row in batch for value in row]
+        execute(
+            cur,
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+            + ", ".join([row_sql] * len(batch)),
+            params,
+        )
+
+
+def get_location_group_metrics(
+    table_name: str,
+    location_groups: Dict[str, int],
+    group_end_dates: Dict[Tuple[str, int], date],
+    period_days: int,
+    country: Optional[str],
+    state: Optional[str],
+    role: Optional[str],
+) -> List[Dict]:
+    current_sql = partial_metrics_sql(_window_sql(0, period_days - 1), "cur_")
+    previous_sql = partial_metrics_sql(_window_sql(period_days, period_days * 2 - 1), "prev_")
+    window_start = min(group_end_dates.values()) - timedelta(days=period_days * 2 - 1)
+    window_end = max(group_end_dates.values())
+
+    sql = (
+        "SELECT t.normalized_role AS normalized_role, l.group_id AS group_id,"
+        f" {current_sql}, {previous_sql}"
+        f" FROM {table_name} t"
+        " JOIN group_locations l ON t.location = l.group_location"
+        " JOIN group_ends e"
+        " ON e.normalized_role = t.normalized_role AND e.group_id = l.group_id"
+        " WHERE t.date_posted BETWEEN %s AND %s"
+    )
+    params: List = [window_start.strftime("%Y-%m-%d"), window_end.strftime("%Y-%m-%d")]
+    sql = _append_location_filter(sql, params, country, state)
+    if role:
+        sql += " AND t.normalized_role = %s"
+        params.append(role)
+    sql += " GROUP BY t.normalized_role, l.group_id"
+
+    with get_read_connection() as conn:
+        with conn.cursor() as cur:
+            # Session temporary tables hold the location -> group mapping and the per-group
+            # end dates; they take their key columns' definitions (and collations) from the
+            # source table and are dropped when the connection closes.
+            execute(
+                cur,
+                "CREATE TEMPORARY TABLE group_locations (group_id INT NOT NULL)"
+                f" SELECT location AS group_location FROM {table_name} LIMIT 0",
+            )
+            execute(
+                cur,
+                "CREATE TEMPORARY TABLE group_ends"
+                " (group_id INT NOT NULL, end_date DATE NOT NULL)"
+                f" SELECT normalized_role FROM {table_name} LIMIT 0",
+            )
+            _insert_rows(
+                cur,
+                "group_locations",
+                ("group_location", "group_id"),
+                list(location_groups.items()),
+            )
+            _insert_rows(
+                cur,
+                "group_ends",
+                ("normalized_role", "group_id", "end_date"),
+                [
+                    (role_name, group_id, end_day.strftime("%Y-%m-%d"))
+                    for (role_name, group_id), end_day in group_end_dates.items()
+                ],
+            )
+            execute(cur, sql, params)
+            return list(cur.fetchall())
+
+
+def merge_partial_metrics(partial: Dict) -> Dict:
+    def average(total_field: str, count_field: str) -> Optional[float]:
+        count = partial.get(count_field) or 0
+        if not count:
+            return None
+        return float(partial.get(total_field) or 0) / count
+
+    merged = {
+        "jobs_count": int(partial.get("jobs_count") or 0),
+        "avg_salary": average("salary_sum", "salary_n"),
+        "remote_share": average("remote_sum", "remote_n"),
+        "avg_confidence": average("confidence_sum", "confidence_n"),
+    }
+    for column in SENIORITY_COLUMNS.values():
+        merged[column] = int(partial.get(column) or 0)
+    return merged
+
+
+def _location_group(
+    location: str,
+    group_by: str,
+    country: Optional[str],
+    state: Optional[str],
+) -> Optional[Tuple[Optional[str], Optional[str]]]:
+    parsed = resolve_location(location)
+    if group_by == "state":
+        if not parsed.state:
+            return None
+        return country or parsed.region_country, parsed.state
+    if not parsed.region_country:
+        return None
+    return parsed.region_country, state
+
+
+def get_grouped_metrics(
+    table_name: str,
+    group_by: str,
+    period_days: int,
+    country: Optional[str],
+    state: Optional[str],
+    role: Optional[str],
+) -> List[Dict]:
+    end_rows = get_location_end_dates(table_name, country, state, role)
+    groups: List[Tuple[Optional[str], Optional[str]]] = []
+    group_ids: Dict[Tuple[Optional[str], Optional[str]], int] = {}
+    location_groups: Dict[str, int] = {}
+    group_end: Dict[Tuple[str, int], date] = {}
+    for row in end_rows:
+        location = row["location"]
+        if location not in location_groups:
+            group = _location_group(location, group_by, country, state)
+            if group is None:
+                continue
+            if group not in group_ids:
+                group_ids[group] = len(groups)
+                groups.append(group)
+            location_groups[location] = group_ids[group]
+        if not row["end_date"]:
+            continue
+        key = (row["normalized_role"], location_groups[location])
+        end_day = to_date(row["end_date"])
+        if key not in group_end or end_day > group_end[key]:
+            group_end[key] = end_day
+    if not group_end:
+        return []
+
+    # Windows end at each (role, group)'s own latest posting; the database aggregates both
+    # windows per group, so only one row per (role, group) comes back.
+    metrics = {
+        (row["normalized_role"], row["group_id"]): row
+        for row in get_location_group_metrics(
+            table_name, location_groups, group_end, period_days, country, state, role
+        )
+    }
+
+    result = []
+    for key in group_end:
+        row = metrics.get(key, {})
+        country_name, state_name = groups[key[1]]
+        result.append(
+            {
+                "role": key[0],
+                "country": country_name,
+                "state": state_name,
+                "current": merge_partial_metrics(
+                    {field: row.get(f"cur_{field}") for field in PARTIAL_SUM_FIELDS}
+                ),
+                "previous": merge_partial_metrics(
+                    {field: row.get(f"prev_{field}") for field in PARTIAL_SUM_FIELDS}
+                ),
+            }
+        )
+    return result
+
+
+def get_multi_period_metrics(
+    table_name: str,
+    periods: List[int],
+    country: Optional[str],
+    state: Optional[str],
+    role: Optional[str],
+) -> Dict[str, Dict[int, Tuple[Dict, Dict]]]:
+    columns = []
+    for period in periods:
+        columns.append(partial_metrics_sql(_window_sql(0, period - 1), f"p{period}_cur_"))
+        columns.append(partial_metrics_sql(_window_sql(period, period * 2 - 1), f"p{period}_prev_"))
+
+    params: List = []
+    end_sql = (
+        f"SELECT normalized_role, MAX(date_posted) AS end_date "
+        f"FROM {table_name} WHERE date_posted IS NOT NULL"
+    )
+    end_sql = _append_location_filter(end_sql, params, country, state)
+    if role:
+        end_sql += " AND normalized_role = %s"
+        params.append(role)
+    end_sql += " GROUP BY normalized_role"
+
+    sql = (
+        f"SELECT t.normalized_role AS normalized_role, {', '.join(columns)}"
+        f" FROM {table_name} t JOIN ({end_sql}) e ON t.normalized_role = e.normalized_role"
+        f" WHERE {_window_sql(0, max(periods) * 2 - 1)}"
+    )
+    sql = _append_location_filter(sql, params, country, state)
+    sql += " GROUP BY t.normalized_role"
+
+    with get_read_connection() as conn:
+        with conn.cursor() as cur:
+            execute(cur, sql, params)
+            rows = cur.fetchall()
+
+    result: Dict[str, Dict[int, Tuple[Dict, Dict]]] = {}
+    for row in rows:
+        if not row["normalized_role"]:
+            continue
+        windows = {}
+        for period in periods:
+            current = {field: row[f"p{period}_cur_{field}"] for field in PARTIAL_SUM_FIELDS}
+            previous = {field: row[f"p{period}_prev_{field}"] for field in PARTIAL_SUM_FIELDS}
+            windows[period] = (merge_partial_metrics(current), merge_partial_metrics(previous))
+        result[row["normalized_role"]] = windows
+    return result
+
+
 def get_last_update(table_name: str, country: Optional[str], state: Optional[str]) -> Optional[str]:
     sql = f"SELECT MAX(date_posted) AS last_update FROM {table_name} WHERE date_posted IS NOT NULL"
     params: List = []
     sql = _append_location_filter(sql, params, country, state)
-    with get_connection() as conn:
+    with get_read_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(sql, params)
+            execute(cur, sql, params)
             row = cur.fetchone()
     return row["last_update"] if row else None
 
 
+def has_column(table_name: str, column: str) -> bool:
+    sql = (
+        "SELECT COUNT(*) AS found FROM information_schema.COLUMNS"
+        " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s"
+    )
+    with get_read_connection() as conn:
+        with conn.cursor() as cur:
+            execute(cur, sql, [table_name, column])
+            row = cur.fetchone()
+    return bool(row and row["found"])
+
+
+def read_data_version(conn, table_name: str, column: str) -> Optional[str]:
+    # MAX over an indexed column is a single index lookup; the scraper bumps it on every
+    # insert and update, so in-place changes produce a new version too.
+    with conn.cursor() as cur:
+        execute(cur, f"SELECT MAX({column}) AS version FROM {table_name}")
+        row = cur.fetchone()
+    if not row or row["version"] is None:
+        return None
+    return str(row["version"])
+
+
+def get_data_version(table_name: str, column: str) -> Optional[str]:
+    with get_read_connection() as conn:
+        return read_data_version(conn, table_name, column)
+
+
 def compute_delta(current: float, previous: float) -> Tuple[float, Optional[float], str]:
     delta_abs = current - previous
     if previous > 0:
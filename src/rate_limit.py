@@ -23,6 +23,21 @@ class InMemoryRateLimitStore:
         with self._lock:
             self._data.clear()
 
+    def peek(self, key: str, limit: int, window_seconds: int) -> RateLimitStatus:
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or now >= entry["reset"]:
+                entry = {"count": 0, "reset": now + window_seconds}
+            count = entry["count"]
+            reset = entry["reset"]
+        return RateLimitStatus(
+            allowed=count < limit,
+            remaining=max(0, limit - count),
+            reset_ts=int(reset),
+            retry_after=max(0, int(reset - now)) if count >= limit else 0,
+        )
+
     def hit(self, key: str, limit: int, window_seconds: int) -> RateLimitStatus:
         now = time.time()
         with self._lock:
@@ -0,0 +1,225 @@
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import stat
+import struct
+import threading
+import time
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Hashable, Optional
+
+logger = logging.getLogger("scanrole.shm_cache")
+
+_MAGIC = 0x53524331  # "SRC1"
+_FILE_HEADER = struct.Struct("<III")  # magic, slot count, slot size
+_FILE_HEADER_SIZE = 64
+# seq, key hash, expires_at, last_access, key length, value length
+_SLOT_HEADER = struct.Struct("<IQddII")
+_SEQ = struct.Struct("<I")
+_ACCESS_OFFSET = 4 + 8 + 8
+_ACCESS = struct.Struct("<d")
+_PROBES = 8
+_READ_RETRIES = 4
+
+
+def _hash_key(key: bytes) -> int:
+    # 0 marks an empty slot.
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+
+
+# Values are stored as JSON, never pickle: the segment is a file other local users could
+# try to write. Dates, decimals and dicts with non-string keys (rows by period) are tagged.
+def _encode(value: Any) -> Any:
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {key: _encode(item) for key, item in value.items()}
+        return {"__items__": [[_encode(key), _encode(item)] for key, item in value.items()]}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    return value
+
+
+def _decode(value: Dict) -> Any:
+    if len(value) == 1:
+        if "__items__" in value:
+            return {key: item for key, item in value["__items__"]}
+        if "__datetime__" in value:
+            return datetime.fromisoformat(value["__datetime__"])
+        if "__date__" in value:
+            return date.fromisoformat(value["__date__"])
+        if "__decimal__" in value:
+            return Decimal(value["__decimal__"])
+    return value
+
+
+def _segment_path(path: str, slots: int, slot_bytes: int) -> str:
+    # Each layout gets its own file: resizing an existing one would SIGBUS workers that
+    # still have the old size mapped.
+    return f"{path}.{slots}x{slot_bytes}"
+
+
+# Fixed-slot cache in a memory-mapped file shared by all workers on the host. Readers never
+# lock: each slot carries a sequence number that writers keep odd while they rewrite it, and a
+# read is retried if the number changed underneath it. Writers serialize on an flock of the
+# backing file. Eviction picks the least recently read slot in the key's probe window.
+class SharedResponseCache:
+    def __init__(self, path: str, slots: int, slot_bytes: int) -> None:
+        self.path = _segment_path(path, slots, slot_bytes)
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.oversize = 0
+        self._thread_lock = threading.Lock()
+        size = _FILE_HEADER_SIZE + slots * slot_bytes
+        flags = os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW | os.O_CLOEXEC
+        fd = os.open(self.path, flags, 0o600)
+        try:
+            info = os.fstat(fd)
+            if not stat.S_ISREG(info.st_mode) or info.st_uid != os.geteuid():
+                raise PermissionError(f"{self.path} is not a regular file owned by this user")
+            if stat.S_IMODE(info.st_mode) & 0o077:
+                raise PermissionError(f"{self.path} is accessible to other users")
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                current = os.fstat(fd).st_size
+                expected = _FILE_HEADER.pack(_MAGIC, slots, slot_bytes)
+                if current == 0:
+                    os.ftruncate(fd, size)
+                    os.pwrite(fd, expected, 0)
+                elif current != size or os.pread(fd, _FILE_HEADER.size, 0) != expected:
+                    raise OSError(f"{self.path} has an unexpected layout")
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._mm = mmap.mmap(fd, size)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def _slot_offset(self, index: int) -> int:
+        return _FILE_HEADER_SIZE + index * self.slot_bytes
+
+    def _probe(self, key_hash: int):
+        start = key_hash % self.slots
+        for i in range(min(_PROBES, self.slots)):
+            yield self._slot_offset((start + i) % self.slots)
+
+    def get_bytes(self, key: bytes) -> Optional[bytes]:
+        key_hash = _hash_key(key)
+        mm = self._mm
+        for offset in self._probe(key_hash):
+            for _ in range(_READ_RETRIES):
+                header = _SLOT_HEADER.unpack_from(mm, offset)
+                seq, slot_hash, expires_at, _, key_len, value_len = header
+                if seq & 1:
+                    continue
+                if slot_hash != key_hash:
+                    break
+                start = offset + _SLOT_HEADER.size
+                payload = mm[start : start + key_len + value_len]
+                if _SEQ.unpack_from(mm, offset)[0] != seq:
+                    continue
+                if payload[:key_len] != key:
+                    break
+                now = time.time()
+                if expires_at < now:
+                    return None
+                _ACCESS.pack_into(mm, offset + _ACCESS_OFFSET, now)
+                return payload[key_len:]
+        return None
+
+    def set_bytes(self, key: bytes, value: bytes, ttl_seconds: float) -> bool:
+        return self._store(key, value, ttl_seconds, replace=True)
+
+    def add_bytes(self, key: bytes, value: bytes, ttl_seconds: float) -> bool:
+        # Stores only if the key has no live entry; the check and the write happen under the
+        # same flock, so exactly one process wins.
+        return self._store(key, value, ttl_seconds, replace=False)
+
+    def _store(self, key: bytes, value: bytes, ttl_seconds: float, replace: bool) -> bool:
+        if _SLOT_HEADER.size + len(key) + len(value) > self.slot_bytes:
+            self.oversize += 1
+            return False
+        key_hash = _hash_key(key)
+        now = time.time()
+        mm = self._mm
+        with self._thread_lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                target = None
+                oldest = None
+                for offset in self._probe(key_hash):
+                    header = _SLOT_HEADER.unpack_from(mm, offset)
+                    seq, slot_hash, expires_at, last_access, key_len, _ = header
+                    start = offset + _SLOT_HEADER.size
+                    if slot_hash == key_hash and mm[start : start + key_len] == key:
+                        if not replace and expires_at >= now:
+                            return False
+                        target = offset
+                        break
+                    if slot_hash == 0 or expires_at < now:
+                        target = offset if target is None else target
+                        continue
+                    if oldest is None or last_access < oldest[0]:
+                        oldest = (last_access, offset)
+                if target is None:
+                    target = oldest[1]
+                seq = _SEQ.unpack_from(mm, target)[0] | 1
+                _SEQ.pack_into(mm, target, seq)
+                _SLOT_HEADER.pack_into(
+                    mm, target, seq, key_hash, now + ttl_seconds, now, len(key), len(value)
+                )
+                start = target + _SLOT_HEADER.size
+                mm[start : start + len(key) + len(value)] = key + value
+                _SEQ.pack_into(mm, target, (seq + 1) & 0xFFFFFFFF)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self.stores += 1
+        return True
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        raw = self.get_bytes(repr(key).encode("utf-8"))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(zlib.decompress(raw), object_hook=_decode)
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float) -> bool:
+        payload = json.dumps(_encode(value), separators=(",", ":")).encode("utf-8")
+        return self.set_bytes(repr(key).encode("utf-8"), zlib.compress(payload, 1), ttl_seconds)
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "oversize": self.oversize,
+            "slots": self.slots,
+            "slot_bytes": self.slot_bytes,
+        }
+
+
+def open_shared_cache(path: str, slots: int, slot_bytes: int) -> Optional[SharedResponseCache]:
+    try:
+        return SharedResponseCache(path, slots, slot_bytes)
+    except OSError as exc:
+        logger.warning("Shared response cache disabled path=%s: %s", path, exc)
+        return None
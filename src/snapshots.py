@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+RowId = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def row_id(row: Dict) -> RowId:
+    return row.get("role"), row.get("country"), row.get("state")
+
+
+class SnapshotStore:
+    def __init__(
+        self, max_versions: int, max_views: int, shared=None, shared_ttl_seconds: float = 0
+    ) -> None:
+        self.max_versions = max(1, max_versions)
+        self.max_views = max(1, max_views)
+        # Optional SharedResponseCache: with several workers, a `since` poll usually lands on
+        # a worker that did not serve the earlier version, so snapshots are published there too.
+        self.shared = shared
+        self.shared_ttl_seconds = shared_ttl_seconds
+        self.shared_hits = 0
+        self._views: "OrderedDict[Hashable, OrderedDict[str, Dict[RowId, Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def has(self, view: Hashable, version: str) -> bool:
+        with self._lock:
+            versions = self._views.get(view)
+            return versions is not None and version in versions
+
+    def put(self, view: Hashable, version: str, rows: List[Dict], publish: bool = True) -> None:
+        snapshot = {row_id(row): row for row in rows}
+        if publish and self.shared is not None:
+            self.shared.set(("snapshot", view, version), rows, self.shared_ttl_seconds)
+        with self._lock:
+            versions = self._views.get(view)
+            if versions is None:
+                versions = OrderedDict()
+                self._views[view] = versions
+            self._views.move_to_end(view)
+            versions[version] = snapshot
+            versions.move_to_end(version)
+            while len(versions) > self.max_versions:
+                versions.popitem(last=False)
+            while len(self._views) > self.max_views:
+                self._views.popitem(last=False)
+
+    def get(self, view: Hashable, version: str) -> Optional[Dict[RowId, Dict]]:
+        with self._lock:
+            versions = self._views.get(view)
+            snapshot = versions.get(version) if versions is not None else None
+        if snapshot is not None or self.shared is None:
+            return snapshot
+        rows = self.shared.get(("snapshot", view, version))
+        if rows is None:
+            return None
+        self.shared_hits += 1
+        self.put(view, version, rows, publish=False)
+        return {row_id(row): row for row in rows}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "views": len(self._views),
+                "snapshots": sum(len(versions) for versions in self._views.values()),
+                "shared_hits": self.shared_hits,
+            }
+
+
+def diff_snapshots(old: Dict[RowId, Dict], new: Dict[RowId, Dict]) -> Tuple[List[Dict], List[Dict]]:
+    changed = [row for key, row in new.items() if old.get(key) != row]
+    removed = [
+        {"role": key[0], "country": key[1], "state": key[2]} for key in old if key not in new
+    ]
+    return changed, removed
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("scanrole.usage")
+
+BUCKET_SECONDS = 3600
+
+
+class UsageRecorder:
+    def __init__(self, db_path: str, flush_seconds: int, retention_days: int) -> None:
+        self.db_path = db_path
+        self.flush_seconds = flush_seconds
+        self.retention_days = retention_days
+        self._pending: Dict[Tuple[str, str, int], int] = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._initialized = False
+        self._last_prune = 0.0
+
+    def record(self, token_key: str, endpoint: str, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        bucket = int(now // BUCKET_SECONDS) * BUCKET_SECONDS
+        key = (token_key, endpoint, bucket)
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + 1
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS api_usage ("
+                " token_key TEXT NOT NULL,"
+                " endpoint TEXT NOT NULL,"
+                " bucket_ts INTEGER NOT NULL,"
+                " requests INTEGER NOT NULL,"
+                " PRIMARY KEY (token_key, endpoint, bucket_ts))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS api_usage_bucket ON api_usage (bucket_ts)")
+            conn.commit()
+            self._initialized = True
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        with self._write_lock:
+            try:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO api_usage (token_key, endpoint, bucket_ts, requests)"
+                            " VALUES (?, ?, ?, ?)"
+                            " ON CONFLICT (token_key, endpoint, bucket_ts)"
+                            " DO UPDATE SET requests = requests + excluded.requests",
+                            [key + (count,) for key, count in pending.items()],
+                        )
+                        self._prune(conn)
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                logger.exception("Usage flush failed rows=%s", len(pending))
+                with self._lock:
+                    for key, count in pending.items():
+                        self._pending[key] = self._pending.get(key, 0) + count
+                return 0
+        return len(pending)
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        now = time.time()
+        if now - self._last_prune < BUCKET_SECONDS:
+            return
+        self._last_prune = now
+        cutoff = int(now - self.retention_days * 86400)
+        conn.execute("DELETE FROM api_usage WHERE bucket_ts < ?", (cutoff,))
+
+    def history(self, token_key: str, days: int) -> List[Dict]:
+        since = int(time.time() // 86400 - days + 1) * 86400
+        totals: Dict[Tuple[str, str], int] = {}
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT endpoint, bucket_ts, requests FROM api_usage"
+                " WHERE token_key = ? AND bucket_ts >= ?",
+                (token_key, since),
+            ).fetchall()
+        finally:
+            conn.close()
+        with self._lock:
+            rows.extend(
+                (endpoint, bucket, count)
+                for (key, endpoint, bucket), count in self._pending.items()
+                if key == token_key and bucket >= since
+            )
+        for endpoint, bucket, count in rows:
+            day = datetime.fromtimestamp(bucket, tz=timezone.utc).strftime("%Y-%m-%d")
+            totals[(day, endpoint)] = totals.get((day, endpoint), 0) + count
+        return [
+            {"date": day, "endpoint": endpoint, "requests": count}
+            for (day, endpoint), count in sorted(totals.items(), reverse=True)
+        ]
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await asyncio.to_thread(self.flush)
+
+    def start(self) -> None:
+        if self._task is None and self.flush_seconds > 0:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
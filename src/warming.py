@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger("scanrole.warming")
+
+
+class CountMinSketch:
+    def __init__(self, width: int = 2048, depth: int = 4) -> None:
+        self.width = width
+        self.depth = depth
+        self._rows = [[0] * width for _ in range(depth)]
+
+    def _indexes(self, key: Hashable) -> List[int]:
+        raw = repr(key).encode("utf-8")
+        digest = hashlib.blake2b(raw, digest_size=4 * self.depth).digest()
+        return [
+            int.from_bytes(digest[i * 4 : i * 4 + 4], "little") % self.width
+            for i in range(self.depth)
+        ]
+
+    def add(self, key: Hashable, count: int = 1) -> int:
+        estimate = None
+        for row, index in zip(self._rows, self._indexes(key)):
+            row[index] += count
+            estimate = row[index] if estimate is None else min(estimate, row[index])
+        return estimate or 0
+
+    def estimate(self, key: Hashable) -> int:
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    def decay(self) -> None:
+        for row in self._rows:
+            for i, value in enumerate(row):
+                row[i] = value >> 1
+
+
+class HotKeyTracker:
+    def __init__(self, capacity: int, width: int = 2048, depth: int = 4) -> None:
+        self.capacity = capacity
+        self.sketch = CountMinSketch(width, depth)
+        self._candidates: Dict[Hashable, int] = {}
+
+    def record(self, key: Hashable) -> None:
+        estimate = self.sketch.add(key)
+        if key in self._candidates or len(self._candidates) < self.capacity:
+            self._candidates[key] = estimate
+            return
+        coldest = min(self._candidates, key=self._candidates.__getitem__)
+        if estimate > self._candidates[coldest]:
+            del self._candidates[coldest]
+            self._candidates[key] = estimate
+
+    def top(self, k: int) -> List[Hashable]:
+        ranked = sorted(self._candidates.items(), key=lambda item: item[1], reverse=True)
+        return [key for key, _ in ranked[:k]]
+
+    def decay(self) -> None:
+        self.sketch.decay()
+        estimates = {key: self.sketch.estimate(key) for key in self._candidates}
+        self._candidates = {key: estimate for key, estimate in estimates.items() if estimate > 0}
+
+
+class WarmClaims:
+    # Cross-worker coordination through the shared cache: the first worker to claim a version
+    # warms it, the others keep serving the previous version until it is marked done. A claim
+    # expires after ttl_seconds, so a worker that dies while warming does not block the rest.
+    def __init__(self, shared, ttl_seconds: float, done_ttl_seconds: float) -> None:
+        self.shared = shared
+        self.ttl_seconds = ttl_seconds
+        self.done_ttl_seconds = done_ttl_seconds
+
+    @staticmethod
+    def _key(version: str) -> bytes:
+        return f"warm:{version}".encode("utf-8")
+
+    def claim(self, version: str) -> bool:
+        return self.shared.add_bytes(self._key(version), b"warming", self.ttl_seconds)
+
+    def finish(self, version: str) -> None:
+        self.shared.set_bytes(self._key(version), b"done", self.done_ttl_seconds)
+
+    def is_done(self, version: str) -> bool:
+        return self.shared.get_bytes(self._key(version)) == b"done"
+
+
+class CacheWarmer:
+    def __init__(
+        self,
+        top_k: int,
+        concurrency: int,
+        poll_seconds: int,
+        claims: Optional[WarmClaims] = None,
+    ) -> None:
+        self.top_k = top_k
+        self.concurrency = max(1, concurrency)
+        self.poll_seconds = poll_seconds
+        self.claims = claims
+        self.tracker = HotKeyTracker(capacity=max(1, top_k) * 4)
+        self.data_version: Optional[str] = None
+        self.warm_runs = 0
+        self.warmed = 0
+        self.failed = 0
+        self.warmed_elsewhere = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, key: Hashable) -> None:
+        self.tracker.record(key)
+
+    async def warm(
+        self, warm_one: Callable[[Hashable, str], Awaitable[None]], version: str
+    ) -> None:
+        keys = self.tracker.top(self.top_k)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(key: Hashable) -> None:
+            async with semaphore:
+                try:
+                    await warm_one(key, version)
+                    self.warmed += 1
+                except Exception:
+                    self.failed += 1
+                    logger.exception("Cache warm failed key=%s version=%s", key, version)
+
+        self.warm_runs += 1
+        await asyncio.gather(*(run(key) for key in keys))
+        self.tracker.decay()
+
+    async def run(
+        self,
+        load_version: Callable[[], Awaitable[Optional[str]]],
+        warm_one: Callable[[Hashable, str], Awaitable[None]],
+    ) -> None:
+        while True:
+            try:
+                version = await load_version()
+            except Exception:
+                logger.exception("Data version check failed")
+                version = None
+            if version is not None and version != self.data_version:
+                if self.data_version is not None and self.top_k > 0:
+                    # Hot views are recomputed under the new version while requests keep
+                    # reading the previous one, then everyone switches over.
+                    if await self._warm_once(warm_one, version):
+                        self.data_version = version
+                else:
+                    self.data_version = version
+            await asyncio.sleep(self.poll_seconds)
+
+    async def _warm_once(
+        self, warm_one: Callable[[Hashable, str], Awaitable[None]], version: str
+    ) -> bool:
+        # Returns whether the version is warm; False keeps the previous one for another poll.
+        if self.claims is None:
+            await self.warm(warm_one, version)
+            return True
+        if await asyncio.to_thread(self.claims.claim, version):
+            await self.warm(warm_one, version)
+            await asyncio.to_thread(self.claims.finish, version)
+            return True
+        if await asyncio.to_thread(self.claims.is_done, version):
+            self.warmed_elsewhere += 1
+            return True
+        return False
+
+    def start(
+        self,
+        load_version: Callable[[], Awaitable[Optional[str]]],
+        warm_one: Callable[[Hashable, str], Awaitable[None]],
+    ) -> None:
+        if self._task is None and self.poll_seconds > 0:
+            self._task = asyncio.create_task(self.run(load_version, warm_one))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "data_version": self.data_version,
+            "warm_runs": self.warm_runs,
+            "warmed": self.warmed,
+            "failed": self.failed,
+            "warmed_elsewhere": self.warmed_elsewhere,
+            "hot_keys": [list(key) for key in self.tracker.top(self.top_k)],
+        }
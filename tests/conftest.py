@@ -0,0 +1,8 @@
+import os
+
+# Settings are read when main is imported; keep tests off shared memory and local files.
+os.environ.setdefault("SHARED_CACHE_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("ACCESS_LOG_ENABLED", "false")
+os.environ.setdefault("DB_READ_HOSTS", "")
+os.environ.setdefault("USAGE_DB_PATH", ":memory:")
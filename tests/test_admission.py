@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from admission import AdaptiveLimiter
+
+
+def _limiter(**overrides):
+    options = dict(
+        initial_limit=2,
+        min_limit=1,
+        max_limit=4,
+        max_queue=2,
+        queue_timeout_seconds=0.05,
+    )
+    options.update(overrides)
+    return AdaptiveLimiter(**options)
+
+
+@pytest.mark.asyncio
+async def test_queued_request_is_admitted_on_release():
+    limiter = _limiter(queue_timeout_seconds=1)
+    assert await limiter.acquire()
+    assert await limiter.acquire()
+
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.queued == 1 and not waiter.done()
+
+    limiter.release()
+    assert await waiter
+    assert limiter.in_flight == 2
+    assert limiter.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_immediately():
+    limiter = _limiter(initial_limit=1, queue_timeout_seconds=1)
+    assert await limiter.acquire()
+    queued = [asyncio.ensure_future(limiter.acquire()) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    assert not await limiter.acquire()
+    assert limiter.rejected == 1
+    assert limiter.timed_out == 0
+
+    limiter.release()
+    limiter.release()
+    assert await asyncio.gather(*queued) == [True, True]
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_rejects_and_leaves_queue():
+    limiter = _limiter(initial_limit=1)
+    assert await limiter.acquire()
+
+    assert not await limiter.acquire()
+    assert limiter.timed_out == 1
+    assert limiter.rejected == 1
+    assert limiter.queued == 0
+    assert limiter.in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    limiter = _limiter(initial_limit=1, queue_timeout_seconds=1)
+    assert await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert limiter.queued == 0
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_on_fast_responses_and_shrinks_on_slow_ones():
+    limiter = _limiter()
+    for _ in range(20):
+        assert await limiter.acquire()
+        limiter.release(latency=0.01)
+    assert limiter.limit == 4
+
+    for _ in range(20):
+        assert await limiter.acquire()
+        limiter.release(latency=1.0)
+    assert limiter.limit == 1
+
+    assert await limiter.acquire()
+    limiter.release(latency=0.01, failed=True)
+    assert limiter.limit == 1
+
+
+def test_latency_target_raises_shrink_threshold():
+    limiter = _limiter(latency_target_seconds=0.5)
+    limiter.release(latency=0.01)
+    before = limiter.limit
+    # Above twice the baseline but under the target: still counts as healthy.
+    limiter.release(latency=0.3)
+    assert limiter.limit > before
+
+    before = limiter.limit
+    limiter.release(latency=0.6)
+    assert limiter.limit < before
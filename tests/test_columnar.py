@@ -0,0 +1,108 @@
+import json
+import random
+
+import pytest
+
+import main
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def _metrics(rng):
+    return {
+        "jobs_count": rng.randint(0, 2000),
+        "avg_salary": rng.choice([None, rng.uniform(50000, 250000)]),
+        "remote_share": rng.random(),
+        "avg_confidence": rng.random(),
+        "junior_count": rng.randint(0, 50),
+        "mid_count": rng.randint(0, 50),
+        "senior_count": rng.randint(0, 50),
+        "staff_count": rng.randint(0, 50),
+        "principal_count": rng.randint(0, 50),
+    }
+
+
+def _rows(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        main._role_row(f"Role {i}", "United States", "TX", _metrics(rng), _metrics(rng))
+        for i in range(count)
+    ]
+
+
+def _multi_period_response(rows_by_period):
+    return {
+        "as_of_date": "2026-01-20",
+        "data_version": "2026-01-20 06:00:00",
+        "periods": {
+            str(period): {
+                "total": len(rows) + 5,
+                "items": rows,
+                "next_cursor": f"cursor-{period}",
+            }
+            for period, rows in rows_by_period.items()
+        },
+        "applied_sort_by": "jobs_current",
+        "applied_sort_dir": "desc",
+    }
+
+
+def _decode(response, fmt):
+    if fmt == "parquet":
+        return pq.read_table(pa.BufferReader(response.body))
+    return pa.ipc.open_stream(response.body).read_all()
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet"])
+def test_round_trip_is_flat_and_carries_paging_metadata(fmt):
+    rows_by_period = {7: _rows(3, seed=1), 30: _rows(4, seed=2)}
+    response = main._columnar_response(_multi_period_response(rows_by_period), fmt, (7, 30))
+
+    assert response.media_type == main.MEDIA_TYPES[fmt]
+    table = _decode(response, fmt)
+    assert all(not pa.types.is_nested(field.type) for field in table.schema)
+    assert [name for name in table.column_names if name.startswith("seniority_")] == [
+        "seniority_junior",
+        "seniority_mid",
+        "seniority_senior",
+        "seniority_staff",
+        "seniority_principal",
+    ]
+    assert table.schema.field("seniority_mid").type == pa.int32()
+
+    expected = [(period, row) for period, rows in rows_by_period.items() for row in rows]
+    decoded = table.to_pylist()
+    assert [row["period_days"] for row in decoded] == [period for period, _ in expected]
+    for got, (_, row) in zip(decoded, expected):
+        assert got["role"] == row["role"]
+        assert got["jobs_current"] == row["jobs_current"]
+        assert got["salary_current"] == row["salary_current"]
+        assert got["jobs_trend"] == row["jobs_trend"]
+        for level, count in row["seniority_counts"].items():
+            assert got[f"seniority_{level.lower()}"] == count
+
+    metadata = {key.decode(): value.decode() for key, value in table.schema.metadata.items()}
+    assert metadata["total:7"] == "8"
+    assert metadata["total:30"] == "9"
+    assert metadata["next_cursor:7"] == "cursor-7"
+    assert metadata["next_cursor:30"] == "cursor-30"
+    assert metadata["data_version"] == "2026-01-20 06:00:00"
+
+
+def test_columnar_pages_are_smaller_than_json():
+    rows = _rows(100)
+    response = {
+        "as_of_date": "2026-01-20",
+        "total": 100,
+        "items": rows,
+        "next_cursor": None,
+        "data_version": "2026-01-20 06:00:00",
+        "applied_sort_by": "jobs_current",
+        "applied_sort_dir": "desc",
+    }
+    json_size = len(json.dumps(response, separators=(",", ":")).encode("utf-8"))
+    arrow_size = len(main._columnar_response(response, "arrow", (30,)).body)
+    parquet_size = len(main._columnar_response(response, "parquet", (30,)).body)
+
+    assert parquet_size < arrow_size < json_size
@@ -0,0 +1,89 @@
+import logging
+
+import pymysql
+import pytest
+
+import db
+import main
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.row = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append((sql, params))
+        if "information_schema.COLUMNS" in sql:
+            if self.conn.columns is None:
+                raise pymysql.err.OperationalError(2013, "Lost connection")
+            self.row = {"found": int(params[1] in self.conn.columns)}
+        else:
+            self.row = {"version": "2026-01-20"}
+
+    def fetchone(self):
+        return self.row
+
+
+class FakeConnection:
+    def __init__(self, columns):
+        self.columns = columns
+        self.statements = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def thread_id(self):
+        return 1
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def version_env(monkeypatch, caplog):
+    conn = FakeConnection(columns=set())
+    monkeypatch.setattr(db, "_connect", lambda *args, **kwargs: conn)
+    monkeypatch.setattr(main, "data_version_source", ("jobs", "updated_at"))
+    monkeypatch.setattr(main.settings, "role_table", "jobs")
+    caplog.set_level(logging.WARNING, logger="scanrole.data_version")
+    return conn, caplog
+
+
+def test_missing_column_falls_back_to_date_posted(version_env):
+    conn, caplog = version_env
+
+    main._check_data_version_source()
+
+    assert main.data_version_source == ("jobs", "date_posted")
+    errors = [r for r in caplog.records if r.levelno == logging.ERROR]
+    assert len(errors) == 1
+    assert "updated_at" in errors[0].getMessage()
+    assert main._probe_data_version(conn) == "2026-01-20"
+    assert conn.statements[-1][0].endswith("SELECT MAX(date_posted) AS version FROM jobs")
+
+
+def test_existing_column_is_kept(version_env):
+    conn, caplog = version_env
+    conn.columns = {"updated_at"}
+
+    main._check_data_version_source()
+
+    assert main.data_version_source == ("jobs", "updated_at")
+    assert not caplog.records
+
+
+def test_unreachable_database_keeps_the_configured_column(version_env):
+    conn, caplog = version_env
+    conn.columns = None
+
+    main._check_data_version_source()
+
+    assert main.data_version_source == ("jobs", "updated_at")
+    assert [r.levelno for r in caplog.records] == [logging.WARNING]
@@ -0,0 +1,118 @@
+import random
+
+import pymysql
+import pytest
+
+import db
+from config import get_settings
+from deadline import QueryBudget, run_with_budget
+
+
+class FakeConnection:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    def thread_id(self):
+        return 1
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def network(monkeypatch):
+    state = {"down": set(), "lag": {}, "versions": {}, "connects": []}
+
+    def connect(settings, host, port, read_timeout=None):
+        state["connects"].append((host, port))
+        if host in state["down"]:
+            raise pymysql.err.OperationalError(2003, f"Can't connect to {host}")
+        return FakeConnection(host, port)
+
+    monkeypatch.setattr(db, "_connect", connect)
+    monkeypatch.setattr(db, "_replication_lag", lambda conn: state["lag"].get(conn.host, 0.0))
+    return state
+
+
+def _router(monkeypatch, hosts, max_lag_seconds=30):
+    router = db.ReadRouter(db.parse_read_hosts(hosts), max_lag_seconds, 0)
+    monkeypatch.setattr(db, "_read_router", router)
+    monkeypatch.setattr(db, "_read_router_loaded", True)
+    return router
+
+
+def _read_host(budget=None):
+    def read():
+        with db.get_read_connection() as conn:
+            return conn.host
+
+    return run_with_budget(budget, read) if budget is not None else read()
+
+
+def test_parse_read_hosts():
+    endpoints = db.parse_read_hosts(" r1:3307*3, r2 ,r3*0,, r4:3310 ", 3306)
+
+    assert [(e.host, e.port, e.weight) for e in endpoints] == [
+        ("r1", 3307, 3),
+        ("r2", 3306, 1),
+        ("r4", 3310, 1),
+    ]
+
+
+def test_candidates_follow_weights(monkeypatch):
+    router = _router(monkeypatch, "heavy*3,light*1")
+    random.seed(1234)
+
+    first = [router.candidates()[0].host for _ in range(4000)]
+
+    assert 0.70 < first.count("heavy") / len(first) < 0.80
+    assert {e.host for e in router.candidates()} == {"heavy", "light"}
+
+
+def test_lagging_replica_is_skipped(monkeypatch, network):
+    router = _router(monkeypatch, "fresh,stale", max_lag_seconds=30)
+    network["lag"] = {"fresh": 2.0, "stale": 120.0}
+
+    router.check_all(get_settings())
+
+    assert [e.host for e in router.candidates()] == ["fresh"]
+    assert {_read_host() for _ in range(20)} == {"fresh"}
+
+
+def test_replica_below_min_version_is_skipped(monkeypatch, network):
+    router = _router(monkeypatch, "ahead,behind")
+    versions = {"ahead": "2026-01-20 10:00:00", "behind": "2026-01-19 23:00:00"}
+    router.version_probe = lambda conn: versions[conn.host]
+
+    router.check_all(get_settings())
+
+    assert [e.host for e in router.candidates("2026-01-20 10:00:00")] == ["ahead"]
+    assert {e.host for e in router.candidates()} == {"ahead", "behind"}
+    budget = QueryBudget(5, min_version="2026-01-20 10:00:00")
+    assert _read_host(budget) == "ahead"
+
+
+def test_failed_replica_falls_back_to_primary(monkeypatch, network):
+    router = _router(monkeypatch, "replica")
+    network["down"].add("replica")
+
+    assert _read_host() == get_settings().db_host
+    endpoint = router.endpoints[0]
+    assert not endpoint.healthy
+    assert endpoint.failures == 1
+    # Marked down until the next health check, so later reads go straight to the primary.
+    network["connects"].clear()
+    _read_host()
+    assert network["connects"] == [(get_settings().db_host, get_settings().db_port)]
+
+
+def test_budget_pins_every_statement_to_one_endpoint(monkeypatch, network):
+    _router(monkeypatch, "r1,r2,r3")
+    random.seed(99)
+
+    for _ in range(10):
+        budget = QueryBudget(5)
+        hosts = {_read_host(budget) for _ in range(10)}
+        assert len(hosts) == 1
+        assert budget.endpoint == (hosts.pop(), 3306)
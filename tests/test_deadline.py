@@ -0,0 +1,180 @@
+import asyncio
+import time
+
+import pytest
+
+import db
+import main
+from auth import require_role_explorer
+from deadline import QueryBudget, QueryCancelled, RequestScope, current_budget, current_scope
+
+ROLES = [f"Role {i}" for i in range(20)]
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if "normalized_role, MAX(date_posted)" in sql:
+            self.rows = [{"normalized_role": role, "end_date": "2026-01-20"} for role in ROLES]
+        elif "DISTINCT normalized_role" in sql:
+            self.conn.calls.append(time.monotonic())
+            time.sleep(1.5)
+            self.rows = [{"normalized_role": role} for role in ROLES]
+        elif "COUNT(*) AS jobs_count" in sql:
+            self.conn.calls.append(time.monotonic())
+            time.sleep(0.2)
+            self.rows = [{"jobs_count": 1}]
+        else:
+            self.rows = [{"last_update": "2026-01-20"}]
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+
+class FakeConnection:
+    next_id = 0
+
+    def __init__(self, calls):
+        FakeConnection.next_id += 1
+        self.id = FakeConnection.next_id
+        self.calls = calls
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def thread_id(self):
+        return self.id
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def app_env(monkeypatch):
+    calls = []
+    killed = []
+    monkeypatch.setattr(db, "_connect", lambda *args, **kwargs: FakeConnection(calls))
+    monkeypatch.setattr(main, "kill_queries", killed.extend)
+    monkeypatch.setattr(main.cache_warmer, "data_version", None)
+    main.app.dependency_overrides[require_role_explorer] = lambda: {}
+    yield calls, killed
+    main.app.dependency_overrides.clear()
+
+
+async def _call(path: str, disconnect_after: float):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    started = time.monotonic()
+    body_sent = False
+    messages = []
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(max(0.0, disconnect_after - (time.monotonic() - started)))
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await main.app(scope, receive, send)
+    status = next(m["status"] for m in messages if m["type"] == "http.response.start")
+    return status, time.monotonic() - started
+
+
+@pytest.mark.asyncio
+async def test_disconnect_kills_queries_and_skips_remaining_roles(app_env):
+    calls, killed = app_env
+    status, elapsed = await _call("/api/v1/role-explorer", disconnect_after=1.0)
+
+    assert status == 504
+    assert elapsed < 2.0
+    # 20 roles x 2 windows would be 40 statements; the per-role check stops shortly after 1s.
+    assert len(calls) < 10
+    assert killed and all(host == main.settings.db_host for host, _, _ in killed)
+
+
+def test_scope_deadline_bounds_every_budget():
+    scope = RequestScope(0.5)
+    first = QueryBudget(25)
+    second = QueryBudget(25)
+    first.attach(scope)
+    second.attach(scope)
+    assert first.deadline == second.deadline == scope.deadline
+
+
+@pytest.mark.asyncio
+async def test_cancelled_budget_is_not_inherited(monkeypatch):
+    monkeypatch.setattr(main.cache_warmer, "data_version", None)
+    key = ("test", "cancelled")
+    stale = QueryBudget(25)
+    stale.cancelled = True
+    main.role_explorer_budgets[key + (None,)] = stale
+
+    scope = RequestScope(5)
+    token = current_scope.set(scope)
+    try:
+        assert await main._shared(key, None, lambda: "fresh") == "fresh"
+    finally:
+        current_scope.reset(token)
+        main.role_explorer_budgets.pop(key + (None,), None)
+    assert scope.budgets and scope.budgets[0] is not stale
+
+
+@pytest.mark.asyncio
+async def test_request_stops_waiting_at_its_deadline(monkeypatch):
+    scope = RequestScope(0.2)
+    token = current_scope.set(scope)
+    try:
+        with pytest.raises(QueryCancelled):
+            await main._shared(("test", "slow"), None, time.sleep, 1.0)
+    finally:
+        current_scope.reset(token)
+
+
+@pytest.mark.asyncio
+async def test_disconnect_kills_meta_queries(app_env):
+    calls, killed = app_env
+    # The fake query ignores KILL and completes; a real one fails and surfaces as a 504.
+    await _call("/api/v1/meta/roles", disconnect_after=0.5)
+
+    assert len(calls) == 1
+    assert killed and all(host == main.settings.db_host for host, _, _ in killed)
+
+
+@pytest.mark.asyncio
+async def test_run_query_budget_belongs_to_the_request_scope():
+    scope = RequestScope(5)
+
+    budget = await main._run_query(scope, current_budget)
+
+    assert scope.budgets == [budget]
+    assert budget.deadline <= scope.deadline
+    with pytest.raises(QueryCancelled):
+        await main._run_query(RequestScope(0.1), time.sleep, 0.5)
@@ -0,0 +1,181 @@
+import re
+from datetime import date
+
+import pytest
+
+import db
+import main
+import queries
+
+POSTINGS = [
+    ("Data Engineer", "Austin, TX", "2026-01-20"),
+    ("Data Engineer", "Austin, TX", "2026-01-08"),
+    ("Data Engineer", "Dallas, TX, US", "2026-01-18"),
+    ("Data Engineer", "Seattle, WA", "2026-01-10"),
+    ("Data Engineer", "Seattle, WA", "2025-12-30"),
+    ("Data Engineer", "Toronto, ON, Canada", "2026-01-05"),
+    ("Data Engineer", "Remote", "2026-01-21"),
+    ("Other", "Austin, TX", "2026-01-19"),
+]
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append(sql)
+        if sql.startswith("CREATE TEMPORARY TABLE"):
+            self.conn.tables[sql.split()[3]] = []
+        elif sql.startswith("INSERT INTO"):
+            table, columns = re.match(r"INSERT INTO (\w+) \(([^)]*)\)", sql).groups()
+            width = len(columns.split(", "))
+            self.conn.tables[table].extend(
+                tuple(params[i : i + width]) for i in range(0, len(params), width)
+            )
+        elif "location, MAX(date_posted)" in sql:
+            end_dates = {}
+            for role, location, posted in self._postings(sql, params):
+                key = (role, location)
+                end_dates[key] = max(end_dates.get(key, posted), posted)
+            self.rows = [
+                {"normalized_role": role, "location": location, "end_date": end_date}
+                for (role, location), end_date in end_dates.items()
+            ]
+        elif "GROUP BY t.normalized_role, l.group_id" in sql:
+            self.rows = self._aggregate(sql, params)
+
+    def _postings(self, sql, params):
+        if "normalized_role = %s" in sql:
+            return [posting for posting in POSTINGS if posting[0] == params[-1]]
+        return POSTINGS
+
+    def _aggregate(self, sql, params):
+        # Emulates the join against the temporary tables for the jobs_count columns.
+        window_start, window_end = params[:2]
+        period = self.conn.period_days
+        groups = dict(self.conn.tables["group_locations"])
+        ends = {(role, group): end for role, group, end in self.conn.tables["group_ends"]}
+        rows = {}
+        for role, location, posted in self._postings(sql, params):
+            group = groups.get(location)
+            end = ends.get((role, group))
+            if group is None or end is None or not window_start <= posted <= window_end:
+                continue
+            offset = (date.fromisoformat(end) - date.fromisoformat(posted)).days
+            row = rows.setdefault(
+                (role, group),
+                {
+                    "normalized_role": role,
+                    "group_id": group,
+                    "cur_jobs_count": 0,
+                    "prev_jobs_count": 0,
+                },
+            )
+            if 0 <= offset < period:
+                row["cur_jobs_count"] += 1
+            elif period <= offset < period * 2:
+                row["prev_jobs_count"] += 1
+        return list(rows.values())
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    def __init__(self, period_days):
+        self.period_days = period_days
+        self.statements = []
+        self.tables = {}
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def thread_id(self):
+        return 1
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    opened = []
+
+    def connect(*args, **kwargs):
+        opened.append(FakeConnection(period_days=7))
+        return opened[-1]
+
+    monkeypatch.setattr(db, "_connect", connect)
+    return opened
+
+
+def _by_group(rows):
+    return {(row["role"], row["country"], row["state"]): row for row in rows}
+
+
+def test_locations_map_to_groups(connections):
+    rows = _by_group(queries.get_grouped_metrics("jobs", "state", 7, None, None, None))
+
+    assert set(rows) == {
+        ("Data Engineer", "United States", "TX"),
+        ("Data Engineer", "United States", "WA"),
+        ("Data Engineer", "Canada", "ON"),
+        ("Other", "United States", "TX"),
+    }
+    # Austin and Dallas share the TX group; "Remote" has no state and is dropped.
+    grouped = connections[-1].tables["group_locations"]
+    group_of = dict(grouped)
+    assert group_of["Austin, TX"] == group_of["Dallas, TX, US"]
+    assert "Remote" not in group_of
+    assert rows[("Data Engineer", "United States", "TX")]["current"]["jobs_count"] == 2
+    assert rows[("Data Engineer", "United States", "TX")]["previous"]["jobs_count"] == 1
+
+
+def test_windows_end_at_each_groups_latest_posting(connections):
+    rows = _by_group(queries.get_grouped_metrics("jobs", "state", 7, None, None, None))
+
+    ends = {(role, group): end for role, group, end in connections[-1].tables["group_ends"]}
+    group_of = dict(connections[-1].tables["group_locations"])
+    assert ends[("Data Engineer", group_of["Austin, TX"])] == "2026-01-20"
+    assert ends[("Data Engineer", group_of["Seattle, WA"])] == "2026-01-10"
+    assert ends[("Other", group_of["Austin, TX"])] == "2026-01-19"
+    # Seattle's window ends on 2026-01-10, not the overall latest posting.
+    seattle = rows[("Data Engineer", "United States", "WA")]
+    assert seattle["current"]["jobs_count"] == 1
+    assert seattle["previous"]["jobs_count"] == 1
+
+
+def test_group_tables_are_filled_in_bounded_batches(connections, monkeypatch):
+    monkeypatch.setattr(queries, "GROUP_BATCH_ROWS", 2)
+
+    queries.get_grouped_metrics("jobs", "state", 7, None, None, None)
+
+    statements = connections[-1].statements
+    inserts = [sql for sql in statements if sql.startswith("INSERT INTO group_locations")]
+    assert len(inserts) == 2
+    assert all(sql.count("(%s, %s)") <= 2 for sql in inserts)
+    aggregate = next(sql for sql in statements if "GROUP BY t.normalized_role" in sql)
+    assert "UNION ALL" not in aggregate
+
+
+def test_grouped_rows_filter_other(connections):
+    rows = main._build_grouped_rows("jobs", "state", 7, None, None, None)
+    assert {row["role"] for row in rows} == {"Data Engineer"}
+
+    rows = main._build_grouped_rows("jobs", "state", 7, None, None, "Other")
+    assert [row["role"] for row in rows] == ["Other"]
+
+
+def test_no_end_dates_skips_the_group_query(connections, monkeypatch):
+    monkeypatch.setattr(queries, "get_location_end_dates", lambda *args: [])
+
+    assert queries.get_grouped_metrics("jobs", "state", 7, None, None, None) == []
+    assert connections == []
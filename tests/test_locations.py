@@ -0,0 +1,70 @@
+import pytest
+
+import legacy_locations as legacy
+import locations
+from locations_bench import build_corpus
+
+EDGE_CASES = [
+    "",
+    "Remote",
+    "Austin, TX",
+    "Austin,TX",
+    "Austin , tx",
+    "Toronto, ON, CA",
+    "Toronto, on, ca",
+    "Sacramento, XX, CA",
+    "Springfield, Illinois, US",
+    "New York, NY, NY",
+    "London, England, UK",
+    "Berlin, Berlin, DE",
+    "Amsterdam, North Holland, NL",
+    "Paris, Ile-de-France, FR",
+    "Paris, Ile-de-France, France",
+    "Somewhere, , ",
+    "London, UK",
+    "Toronto, Canada",
+    "Munich, Germany",
+    "Utrecht, Netherlands",
+    "Washington, DC",
+    "Lyon, France",
+    "A, B, C, D",
+]
+
+
+def _assert_same(location):
+    old = legacy.parse_location_parts(location)
+    new = locations.resolve_location(location)
+    expected = (old["city"], old["state"], old["country"])
+    assert (new.city, new.state, new.country) == expected, location
+    group = legacy.location_group(location, "country", None, None)
+    assert new.region_country == (group[0] if group else None), location
+
+
+@pytest.mark.parametrize("location", EDGE_CASES)
+def test_edge_cases_match_legacy_parser(location):
+    _assert_same(location)
+
+
+def test_generated_corpus_matches_legacy_parser():
+    pool, corpus = build_corpus(20000, 2000)
+    for location in pool:
+        _assert_same(location)
+    resolved = [locations.resolve_location(location) for location in corpus]
+    assert locations.resolve_locations(corpus) == resolved
+
+
+TOKENS = ["US", "usa", "UK", "gb", "CA", "Canada", "DE", "NE", "NL", "FR", "France", "", None]
+
+
+@pytest.mark.parametrize("token", TOKENS)
+def test_country_tokens_match_legacy(token):
+    assert locations.normalize_country_token(token) == legacy.normalize_country_token(token)
+    assert locations.infer_country_from_state(token) == legacy.infer_country_from_state(token)
+
+
+def test_batch_bypasses_memo_when_it_would_churn(monkeypatch):
+    locations.resolve_location.cache_clear()
+    monkeypatch.setattr(locations, "LOCATION_MEMO_SIZE", 10)
+    values = [f"City {i}, TX" for i in range(50)]
+    assert [loc.state for loc in locations.resolve_locations(values)] == ["TX"] * 50
+    assert locations.memo_stats()["size"] == 0
@@ -0,0 +1,83 @@
+import logging
+
+import pytest
+
+import logs
+from logs import SampledLogger
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def sampled(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(logs.time, "monotonic", lambda: clock[0])
+    logger = logging.getLogger("scanrole.test_sampling")
+    logger.propagate = False
+    handler = _Records()
+    logger.addHandler(handler)
+    yield SampledLogger(logger, interval_seconds=10, burst=2, max_keys=2), handler.records, clock
+    logger.removeHandler(handler)
+
+
+def test_burst_then_suppressed_count_on_next_line(sampled):
+    sampler, records, clock = sampled
+    for _ in range(5):
+        sampler.warning("1.2.3.4", "Rate limited ip=%s", "1.2.3.4", fields={"ip": "1.2.3.4"})
+    assert len(records) == 2
+    assert all("suppressed" not in record.fields for record in records)
+
+    clock[0] += 10
+    sampler.warning("1.2.3.4", "Rate limited ip=%s", "1.2.3.4", fields={"ip": "1.2.3.4"})
+    assert len(records) == 3
+    assert records[-1].getMessage() == "Rate limited ip=1.2.3.4 suppressed=3"
+    assert records[-1].fields == {"ip": "1.2.3.4", "suppressed": 3}
+
+
+def test_keys_are_sampled_independently(sampled):
+    sampler, records, _ = sampled
+    for _ in range(3):
+        sampler.warning("a", "line")
+        sampler.warning("b", "line")
+    assert len(records) == 4
+
+
+def test_flush_writes_summary_for_expired_windows(sampled):
+    sampler, records, clock = sampled
+    for _ in range(6):
+        sampler.warning("a", "line")
+    sampler.flush()
+    assert len(records) == 2
+
+    clock[0] += 10
+    sampler.flush()
+    assert len(records) == 3
+    assert records[-1].getMessage() == "Suppressed 4 log lines key=a"
+    assert records[-1].fields == {"key": "a", "suppressed": 4}
+
+    # The window is gone: the next line starts a fresh burst without a count.
+    sampler.warning("a", "line")
+    assert "suppressed" not in records[-1].fields
+
+
+def test_flush_is_quiet_without_suppressed_lines(sampled):
+    sampler, records, clock = sampled
+    sampler.warning("a", "line")
+    clock[0] += 10
+    sampler.flush()
+    assert len(records) == 1
+
+
+def test_new_keys_share_one_window_past_max_keys(sampled):
+    sampler, records, _ = sampled
+    for key in ("a", "b", "c", "d", "e"):
+        sampler.warning(key, "line")
+    # a and b fill max_keys; c, d and e share the "*" window with a burst of 2.
+    assert len(records) == 4
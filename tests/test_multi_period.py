@@ -0,0 +1,236 @@
+import re
+from datetime import date, timedelta
+
+import httpx
+import pytest
+
+import db
+import main
+import queries
+from auth import require_role_explorer
+
+END = date(2026, 1, 20)
+
+# (role, days before END, salary, is_remote, role_confidence, seniority)
+POSTINGS = [
+    ("Data Engineer", 0, 120000, 1, 0.9, "Senior"),
+    ("Data Engineer", 3, 100000, 0, 0.8, "Mid"),
+    ("Data Engineer", 9, 90000, 1, 0.7, "Junior"),
+    ("Data Engineer", 20, None, None, 0.6, "Senior"),
+    ("Data Engineer", 45, 80000, 0, None, "Staff"),
+    ("Software Engineer", 2, 150000, 1, 0.95, "Principal"),
+    ("Software Engineer", 8, 130000, 0, 0.85, "Senior"),
+    ("Software Engineer", 13, 110000, 1, 0.75, "Mid"),
+    ("Software Engineer", 35, 105000, None, 0.65, "Junior"),
+    ("Other", 1, 50000, 0, 0.5, "Mid"),
+]
+
+
+def _postings():
+    for role, days_ago, salary, remote, confidence, seniority in POSTINGS:
+        # The latest Software Engineer posting is two days old, so its windows end earlier.
+        yield role, END - timedelta(days=days_ago), salary, remote, confidence, seniority
+
+
+def _end_dates():
+    ends = {}
+    for role, posted, *_ in _postings():
+        ends[role] = max(ends.get(role, posted), posted)
+    return ends
+
+
+def _partial(rows):
+    salaries = [row[2] for row in rows if row[2] is not None]
+    remote = [row[3] for row in rows if row[3] is not None]
+    confidence = [row[4] for row in rows if row[4] is not None]
+    partial = {
+        "jobs_count": len(rows),
+        "salary_sum": sum(salaries) if salaries else None,
+        "salary_n": len(salaries),
+        "remote_sum": sum(remote) if remote else None,
+        "remote_n": len(remote),
+        "confidence_sum": sum(confidence) if confidence else None,
+        "confidence_n": len(confidence),
+    }
+    for level, column in queries.SENIORITY_COLUMNS.items():
+        partial[column] = sum(1 for row in rows if row[5] == level)
+    return partial
+
+
+def _window(role, end, newest, oldest):
+    return [
+        row
+        for row in _postings()
+        if row[0] == role and end - timedelta(days=oldest) <= row[1] <= end - timedelta(days=newest)
+    ]
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append((sql, params))
+        if "p7_cur_jobs_count" in sql or "p30_cur_jobs_count" in sql:
+            self.rows = self._multi_period(sql)
+        elif "normalized_role, MAX(date_posted) AS end_date" in sql:
+            self.rows = [
+                {"normalized_role": role, "end_date": end.isoformat()}
+                for role, end in _end_dates().items()
+            ]
+        elif "AVG(role_confidence)" in sql:
+            self.rows = [self._metrics(*params[:3])]
+        else:
+            self.rows = [{"last_update": END.isoformat()}]
+
+    def _metrics(self, role, start, end):
+        rows = [row for row in _postings() if row[0] == role and start <= row[1].isoformat() <= end]
+        partial = _partial(rows)
+        merged = queries.merge_partial_metrics(partial)
+        return {
+            "jobs_count": merged["jobs_count"],
+            "avg_salary": merged["avg_salary"],
+            "remote_share": merged["remote_share"],
+            "avg_confidence": merged["avg_confidence"],
+            **{column: partial[column] for column in queries.SENIORITY_COLUMNS.values()},
+        }
+
+    def _multi_period(self, sql):
+        periods = sorted({int(p) for p in re.findall(r"AS p(\d+)_cur_jobs_count", sql)})
+        rows = []
+        for role, end in _end_dates().items():
+            row = {"normalized_role": role}
+            for period in periods:
+                current = _partial(_window(role, end, 0, period - 1))
+                previous = _partial(_window(role, end, period, period * 2 - 1))
+                for field in queries.PARTIAL_SUM_FIELDS:
+                    row[f"p{period}_cur_{field}"] = current[field]
+                    row[f"p{period}_prev_{field}"] = previous[field]
+            rows.append(row)
+        return rows
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+
+class FakeConnection:
+    def __init__(self, statements):
+        self.statements = statements
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def thread_id(self):
+        return 1
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    executed = []
+    monkeypatch.setattr(db, "_connect", lambda *args, **kwargs: FakeConnection(executed))
+    monkeypatch.setattr(main.cache_warmer, "data_version", None)
+    return executed
+
+
+def test_columns_are_aliased_per_period_and_window(statements):
+    queries.get_multi_period_metrics("jobs", [7, 30], None, None, None)
+
+    sql, _ = statements[-1]
+    aliases = set(re.findall(r" AS (p\d+_(?:cur|prev)_\w+)", sql))
+    assert aliases == {
+        f"p{period}_{window}_{field}"
+        for period in (7, 30)
+        for window in ("cur", "prev")
+        for field in queries.PARTIAL_SUM_FIELDS
+    }
+    # The outer scan covers the widest range: both 30-day windows.
+    assert "INTERVAL 59 DAY" in sql.rsplit("WHERE", 1)[1]
+
+
+def test_subquery_params_come_before_the_outer_filter(statements):
+    queries.get_multi_period_metrics("jobs", [7, 30], "Canada", "ON", "Data Engineer")
+
+    sql, params = statements[-1]
+    location = []
+    queries._append_location_filter("", location, "Canada", "ON")
+    assert params == location + ["Data Engineer"] + location
+    assert sql.count("%s") == len(params)
+    # The role placeholder is the first one after the subquery's location filter.
+    placeholders = [match.start() for match in re.finditer("%s", sql)]
+    assert placeholders[len(location)] == sql.index("normalized_role = %s") + len(
+        "normalized_role = "
+    )
+    assert placeholders[len(location) + 1] > sql.index(") e ON")
+
+
+def test_windows_map_back_to_each_period(statements):
+    result = queries.get_multi_period_metrics("jobs", [7, 30], None, None, None)
+
+    current, previous = result["Data Engineer"][7]
+    assert current["jobs_count"] == 2
+    assert current["avg_salary"] == 110000
+    assert previous["jobs_count"] == 1
+    current, previous = result["Software Engineer"][30]
+    assert current["jobs_count"] == 3
+    assert previous["jobs_count"] == 1
+    assert current["principal_count"] == 1
+
+
+async def _get(params):
+    main.app.dependency_overrides[require_role_explorer] = lambda: {}
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            response = await client.get("/api/v1/role-explorer", params=params)
+    finally:
+        main.app.dependency_overrides.clear()
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_multi_period_rows_match_single_period_requests(statements):
+    combined = await _get({"period_days": "7,30", "page_size": 100})
+
+    for period in (7, 30):
+        single = await _get({"period_days": str(period), "page_size": 100})
+        assert combined["periods"][str(period)]["items"] == single["items"]
+        assert combined["periods"][str(period)]["total"] == single["total"]
+
+
+@pytest.mark.asyncio
+async def test_multi_period_response_shape(statements):
+    body = await _get({"period_days": "7,30", "page_size": 10, "sort_by": "role"})
+
+    assert set(body) == {
+        "as_of_date",
+        "data_version",
+        "periods",
+        "applied_sort_by",
+        "applied_sort_dir",
+    }
+    assert body["as_of_date"] == END.isoformat()
+    assert body["applied_sort_by"] == "role"
+    assert list(body["periods"]) == ["7", "30"]
+    for result in body["periods"].values():
+        assert set(result) == {"total", "items", "next_cursor"}
+        assert result["total"] == 2
+        assert [item["role"] for item in result["items"]] == ["Software Engineer", "Data Engineer"]
+        assert result["next_cursor"] is None
+    # Other is only returned when it is the requested role.
+    assert all(
+        item["role"] != "Other" for result in body["periods"].values() for item in result["items"]
+    )
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from pagination import InvalidCursor, decode_cursor, encode_cursor, select_page, sort_key
+
+
+def _rows(count: int, seed: int = 3):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        rows.append(
+            {
+                "role": f"Role {rng.randrange(count // 3)}",
+                "country": rng.choice(["United States", "Canada", None]),
+                "state": f"S{i}",
+                "jobs_current": rng.choice([None, 0, 1, 5, 5, 12]),
+                "salary_current": rng.choice([None, 81000.5, 120000.0, 95000.25]),
+            }
+        )
+    rng.shuffle(rows)
+    return rows
+
+
+def _two_pass(rows, sort_by: str, sort_dir: str):
+    # The sort role-explorer used before pagination.py.
+    rows = sorted(
+        rows, key=lambda r: (r.get("role") or "", r.get("country") or "", r.get("state") or "")
+    )
+
+    def primary_key(row):
+        value = row.get(sort_by)
+        if value is None:
+            return (1, None)
+        return (0, value)
+
+    return sorted(rows, key=primary_key, reverse=sort_dir == "desc")
+
+
+ORDERS = [
+    (sort_by, sort_dir)
+    for sort_by in ("jobs_current", "salary_current", "role")
+    for sort_dir in ("asc", "desc")
+]
+
+
+@pytest.mark.parametrize("sort_by,sort_dir", ORDERS)
+def test_offset_pages_match_two_pass_sort(sort_by, sort_dir):
+    rows = _rows(120)
+    expected = _two_pass(rows, sort_by, sort_dir)
+
+    def key(row):
+        return sort_key(row, sort_by, sort_dir)
+
+    for offset in range(0, len(rows) + 10, 25):
+        assert select_page(rows, key, 25, offset) == expected[offset : offset + 25]
+
+
+@pytest.mark.parametrize("sort_by,sort_dir", ORDERS)
+def test_cursor_walk_matches_two_pass_sort(sort_by, sort_dir):
+    rows = _rows(120)
+
+    def key(row):
+        return sort_key(row, sort_by, sort_dir)
+
+    walked = []
+    after = None
+    while True:
+        page = select_page(rows, key, 17, after=after)
+        walked.extend(page)
+        if len(page) < 17:
+            break
+        after = decode_cursor(encode_cursor(page[-1], sort_by, sort_dir), sort_by, sort_dir)
+    assert walked == _two_pass(rows, sort_by, sort_dir)
+
+
+def test_nulls_go_last_ascending_and_first_descending():
+    rows = [
+        {"role": "A", "country": None, "state": None, "jobs_current": None},
+        {"role": "B", "country": None, "state": None, "jobs_current": 3},
+        {"role": "C", "country": None, "state": None, "jobs_current": 1},
+    ]
+    asc = select_page(rows, lambda r: sort_key(r, "jobs_current", "asc"), 3)
+    desc = select_page(rows, lambda r: sort_key(r, "jobs_current", "desc"), 3)
+    assert [r["role"] for r in asc] == ["C", "B", "A"]
+    assert [r["role"] for r in desc] == ["A", "B", "C"]
+
+
+def test_cursor_must_match_sort_order():
+    row = {"role": "A", "country": None, "state": None, "jobs_current": 3}
+    cursor = encode_cursor(row, "jobs_current", "desc")
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "jobs_current", "asc")
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "salary_current", "desc")
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not a cursor", "jobs_current", "desc")
@@ -0,0 +1,144 @@
+import hashlib
+import multiprocessing
+import os
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from shm_cache import SharedResponseCache, open_shared_cache
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache")
+
+
+def _payload(size: int) -> bytes:
+    body = os.urandom(size)
+    return body + hashlib.sha256(body).digest()
+
+
+def _write_forever(path: str, stop, rounds) -> None:
+    cache = SharedResponseCache(path, 4, 1 << 16)
+    # Different lengths, so a torn read would mix two payloads or cut one short.
+    payloads = [_payload(size) for size in (20000, 35000, 50000, 27000)]
+    n = 0
+    while not stop.is_set():
+        cache.set_bytes(b"hot", payloads[n % len(payloads)], 60)
+        n += 1
+        rounds.value = n
+    cache.close()
+
+
+def test_values_round_trip(cache_path):
+    cache = SharedResponseCache(cache_path, 8, 4096)
+    value = {
+        "rows": [{"role": "Dev", "salary": Decimal("1.50"), "day": date(2026, 1, 2)}],
+        "by_period": {7: ["a"], 30: ["b"]},
+        "at": datetime(2026, 1, 2, 3, 4, 5),
+    }
+    assert cache.set(("view", 7), value, 60)
+    assert cache.get(("view", 7)) == value
+    assert cache.get(("view", 30)) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    cache.close()
+
+
+def test_expired_and_oversize_entries(cache_path):
+    cache = SharedResponseCache(cache_path, 8, 256)
+    assert cache.set("gone", [1], -1)
+    assert cache.get("gone") is None
+    assert not cache.set("big", os.urandom(400).hex(), 60)
+    assert cache.oversize == 1
+    cache.close()
+
+
+def test_other_process_sees_writes(cache_path):
+    cache = SharedResponseCache(cache_path, 8, 4096)
+    ctx = multiprocessing.get_context("fork")
+    child = ctx.Process(
+        target=lambda: SharedResponseCache(cache_path, 8, 4096).set("k", {"from": "child"}, 60)
+    )
+    child.start()
+    child.join(10)
+    assert child.exitcode == 0
+    assert cache.get("k") == {"from": "child"}
+    cache.close()
+
+
+def _add_claim(path: str, results, index: int) -> None:
+    cache = SharedResponseCache(path, 8, 4096)
+    results[index] = int(cache.add_bytes(b"claim", b"mine", 60))
+    cache.close()
+
+
+def test_add_has_exactly_one_winner(cache_path):
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Array("i", [0] * 8)
+    children = [ctx.Process(target=_add_claim, args=(cache_path, results, i)) for i in range(8)]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join(10)
+        assert child.exitcode == 0
+    assert sum(results) == 1
+
+
+def test_add_replaces_only_expired_entries(cache_path):
+    cache = SharedResponseCache(cache_path, 8, 4096)
+    assert cache.add_bytes(b"claim", b"first", 0.05)
+    assert not cache.add_bytes(b"claim", b"second", 60)
+    time.sleep(0.1)
+    assert cache.add_bytes(b"claim", b"third", 60)
+    assert cache.get_bytes(b"claim") == b"third"
+    cache.close()
+
+
+def test_reads_never_see_torn_writes(cache_path):
+    cache = SharedResponseCache(cache_path, 4, 1 << 16)
+    ctx = multiprocessing.get_context("fork")
+    stop = ctx.Event()
+    rounds = ctx.Value("q", 0)
+    writer = ctx.Process(target=_write_forever, args=(cache_path, stop, rounds))
+    writer.start()
+    try:
+        seen = 0
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline:
+            value = cache.get_bytes(b"hot")
+            if value is None:
+                continue
+            assert hashlib.sha256(value[:-32]).digest() == value[-32:]
+            seen += 1
+    finally:
+        stop.set()
+        writer.join(10)
+    assert writer.exitcode == 0
+    assert seen > 0 and rounds.value > 100
+    cache.close()
+
+
+def test_layout_gets_its_own_file(cache_path):
+    small = SharedResponseCache(cache_path, 4, 1024)
+    large = SharedResponseCache(cache_path, 8, 1024)
+    assert small.path != large.path
+    small.set("k", 1, 60)
+    assert large.get("k") is None
+    small.close()
+    large.close()
+
+
+def test_refuses_shared_or_symlinked_files(cache_path, tmp_path):
+    target = cache_path + ".4x1024"
+    open(target, "wb").close()
+    os.chmod(target, 0o644)
+    with pytest.raises(PermissionError):
+        SharedResponseCache(cache_path, 4, 1024)
+    assert open_shared_cache(cache_path, 4, 1024) is None
+
+    os.remove(target)
+    os.symlink(tmp_path / "elsewhere", target)
+    assert open_shared_cache(cache_path, 4, 1024) is None
+    assert not (tmp_path / "elsewhere").exists()
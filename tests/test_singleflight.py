@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_execution():
+    flights = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return calls
+
+    waiters = [asyncio.ensure_future(flights.do("k", work)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert flights.stats() == {"executions": 1, "coalesced": 4, "in_flight": 1, "waiters": 5}
+
+    release.set()
+    assert await asyncio.gather(*waiters) == [1] * 5
+    assert calls == 1
+    assert flights.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0, "waiters": 0}
+
+
+@pytest.mark.asyncio
+async def test_distinct_keys_and_later_calls_run_again():
+    flights = SingleFlight()
+
+    async def work(value):
+        await asyncio.sleep(0)
+        return value
+
+    both = await asyncio.gather(flights.do("a", lambda: work(1)), flights.do("b", lambda: work(2)))
+    assert both == [1, 2]
+    assert await flights.do("a", lambda: work(3)) == 3
+    assert flights.executions == 3
+    assert flights.coalesced == 0
+
+
+@pytest.mark.asyncio
+async def test_error_reaches_every_waiter():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        flights.do("k", fail), flights.do("k", fail), return_exceptions=True
+    )
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert flights.executions == 1
+    assert flights.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_work():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return "done"
+
+    first = asyncio.ensure_future(flights.do("k", work))
+    second = asyncio.ensure_future(flights.do("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    assert flights.stats()["waiters"] == 1
+
+    release.set()
+    assert await second == "done"
+    assert first.cancelled()
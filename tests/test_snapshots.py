@@ -0,0 +1,160 @@
+import asyncio
+
+import httpx
+import pytest
+
+import db
+import main
+from auth import require_role_explorer
+from shm_cache import SharedResponseCache
+from snapshots import SnapshotStore, diff_snapshots
+
+ROLES = ["Data Engineer", "Other", "Software Engineer"]
+
+
+def _row(role, jobs, state=None):
+    return {"role": role, "country": "United States", "state": state, "jobs_current": jobs}
+
+
+def test_store_keeps_the_latest_versions_per_view():
+    store = SnapshotStore(max_versions=2, max_views=2)
+    for version in ("v1", "v2", "v3"):
+        store.put("view-a", version, [_row("Dev", 1)])
+
+    assert not store.has("view-a", "v1")
+    assert store.has("view-a", "v2") and store.has("view-a", "v3")
+    # Putting v1 again makes it the newest; v2 is the oldest now.
+    store.put("view-a", "v1", [_row("Dev", 1)])
+    assert not store.has("view-a", "v2")
+
+
+def test_store_evicts_the_least_recently_written_view():
+    store = SnapshotStore(max_versions=2, max_views=2)
+    store.put("view-a", "v1", [])
+    store.put("view-b", "v1", [])
+    store.put("view-a", "v2", [])
+    store.put("view-c", "v1", [])
+
+    assert store.has("view-a", "v2")
+    assert not store.has("view-b", "v1")
+    assert store.stats() == {"views": 2, "snapshots": 3, "shared_hits": 0}
+
+
+def test_diff_reports_changed_added_and_removed_rows():
+    old = SnapshotStore(1, 1)
+    old.put("view", "v1", [_row("Dev", 10), _row("Ops", 5), _row("QA", 3, state="TX")])
+    new = SnapshotStore(1, 1)
+    new.put("view", "v2", [_row("Dev", 12), _row("Ops", 5), _row("PM", 1)])
+
+    changed, removed = diff_snapshots(old.get("view", "v1"), new.get("view", "v2"))
+
+    assert changed == [_row("Dev", 12), _row("PM", 1)]
+    assert removed == [{"role": "QA", "country": "United States", "state": "TX"}]
+
+
+def test_snapshots_fall_back_to_the_shared_cache(tmp_path):
+    shared = SharedResponseCache(str(tmp_path / "cache"), 16, 4096)
+    # Two workers: only the first computed v1.
+    first = SnapshotStore(max_versions=2, max_views=4, shared=shared, shared_ttl_seconds=60)
+    second = SnapshotStore(max_versions=2, max_views=4, shared=shared, shared_ttl_seconds=60)
+    first.put("view", "v1", [_row("Dev", 10)])
+
+    snapshot = second.get("view", "v1")
+
+    assert snapshot == {("Dev", "United States", None): _row("Dev", 10)}
+    assert second.has("view", "v1")
+    assert second.stats()["shared_hits"] == 1
+    assert second.get("view", "v0") is None
+    shared.close()
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if "normalized_role, MAX(date_posted)" in sql:
+            self.rows = [{"normalized_role": role, "end_date": "2026-01-20"} for role in ROLES]
+        elif "COUNT(*) AS jobs_count" in sql:
+            self.rows = [{"jobs_count": 1}]
+        elif "AS version" in sql:
+            self.rows = [{"version": None}]
+        else:
+            self.rows = [{"last_update": "2026-01-20"}]
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+
+class FakeConnection:
+    def cursor(self):
+        return FakeCursor(self)
+
+    def thread_id(self):
+        return 1
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(db, "_connect", lambda *args, **kwargs: FakeConnection())
+    monkeypatch.setattr(main.cache_warmer, "data_version", None)
+    main.app.dependency_overrides[require_role_explorer] = lambda: {}
+    transport = httpx.ASGITransport(app=main.app)
+    yield httpx.AsyncClient(transport=transport, base_url="http://testserver")
+    main.app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_sorting_by_role_records_the_full_snapshot(client, monkeypatch):
+    version = "2026-01-20 snapshot-sort"
+    monkeypatch.setattr(main.cache_warmer, "data_version", version)
+    view = (30, None, None, None, None)
+
+    async with client:
+        response = await client.get(
+            "/api/v1/role-explorer",
+            params={"sort_by": "role", "sort_dir": "asc", "page_size": 10},
+        )
+        assert response.status_code == 200
+        assert [item["role"] for item in response.json()["items"]] == [
+            "Data Engineer",
+            "Software Engineer",
+        ]
+        await asyncio.gather(*main._snapshot_tasks)
+
+        assert main.role_explorer_snapshots.has(view, version)
+        changes = await client.get("/api/v1/role-explorer/changes", params={"since": version})
+
+    assert changes.json() == {
+        "data_version": version,
+        "since": version,
+        "full": False,
+        "changed": [],
+        "removed": [],
+    }
+
+
+@pytest.mark.asyncio
+async def test_changes_without_a_data_version_return_the_full_rows(client):
+    async with client:
+        response = await client.get("/api/v1/role-explorer/changes", params={"since": "v1"})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert body["data_version"] is None
+    assert body["full"] is True
+    assert [row["role"] for row in body["changed"]] == ["Data Engineer", "Software Engineer"]
+    assert body["removed"] == []
@@ -0,0 +1,134 @@
+import sqlite3
+import time
+
+import httpx
+import pytest
+
+import main
+from auth import require_role_explorer
+from rate_limit import extract_token_identifier
+from usage import BUCKET_SECONDS, UsageRecorder
+
+DAY = 86400
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    return UsageRecorder(str(tmp_path / "usage.sqlite3"), flush_seconds=0, retention_days=7)
+
+
+def _stored(recorder):
+    conn = sqlite3.connect(recorder.db_path)
+    try:
+        return conn.execute(
+            "SELECT token_key, endpoint, bucket_ts, requests FROM api_usage ORDER BY bucket_ts"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def _bucket(now):
+    return int(now // BUCKET_SECONDS) * BUCKET_SECONDS
+
+
+def test_flush_merges_into_existing_rows(recorder):
+    now = time.time()
+    recorder.record("t1", "/api/v1/role-explorer", now)
+    recorder.record("t1", "/api/v1/role-explorer", now)
+    assert recorder.flush() == 1
+
+    recorder.record("t1", "/api/v1/role-explorer", now)
+    recorder.record("t1", "/api/v1/meta/roles", now)
+    assert recorder.flush() == 2
+
+    assert sorted(_stored(recorder)) == [
+        ("t1", "/api/v1/meta/roles", _bucket(now), 1),
+        ("t1", "/api/v1/role-explorer", _bucket(now), 3),
+    ]
+    assert recorder.flush() == 0
+
+
+def test_failed_flush_requeues_pending_counts(recorder, monkeypatch):
+    now = time.time()
+    recorder.record("t1", "/api/v1/usage", now)
+    recorder.record("t1", "/api/v1/usage", now)
+
+    def broken():
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(recorder, "_connect", broken)
+    assert recorder.flush() == 0
+    monkeypatch.undo()
+
+    # Counts recorded while the flush was failing are merged with the re-queued ones.
+    recorder.record("t1", "/api/v1/usage", now)
+    assert recorder.flush() == 1
+    assert _stored(recorder) == [("t1", "/api/v1/usage", _bucket(now), 3)]
+
+
+def test_flush_prunes_rows_past_retention(recorder):
+    now = time.time()
+    recorder.record("t1", "/api/v1/usage", now - 10 * DAY)
+    recorder.record("t1", "/api/v1/usage", now - 2 * DAY)
+    recorder.record("t1", "/api/v1/usage", now)
+
+    recorder.flush()
+
+    assert [row[2] for row in _stored(recorder)] == [_bucket(now - 2 * DAY), _bucket(now)]
+
+
+def test_history_includes_pending_counts(recorder):
+    now = time.time()
+    recorder.record("t1", "/api/v1/usage", now)
+    recorder.record("t1", "/api/v1/usage", now - DAY)
+    recorder.record("t2", "/api/v1/usage", now)
+    recorder.flush()
+    recorder.record("t1", "/api/v1/usage", now)
+    recorder.record("t1", "/api/v1/meta/roles", now)
+
+    history = recorder.history("t1", days=2)
+
+    today = time.strftime("%Y-%m-%d", time.gmtime(now))
+    yesterday = time.strftime("%Y-%m-%d", time.gmtime(now - DAY))
+    assert history == [
+        {"date": today, "endpoint": "/api/v1/usage", "requests": 2},
+        {"date": today, "endpoint": "/api/v1/meta/roles", "requests": 1},
+        {"date": yesterday, "endpoint": "/api/v1/usage", "requests": 1},
+    ]
+    assert [row["requests"] for row in recorder.history("t1", days=1)] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_usage_endpoint_reports_history(recorder, monkeypatch):
+    monkeypatch.setattr(main, "usage_recorder", recorder)
+    main.app.dependency_overrides[require_role_explorer] = lambda: {}
+    token_key, _ = extract_token_identifier("Bearer abcdef0123456789")
+    now = time.time()
+    recorder.record(token_key, "/api/v1/role-explorer", now)
+    recorder.flush()
+    recorder.record(token_key, "/api/v1/role-explorer", now)
+
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            response = await client.get(
+                "/api/v1/usage",
+                params={"days": 7},
+                headers={"Authorization": "Bearer abcdef0123456789"},
+            )
+            missing = await client.get("/api/v1/usage")
+    finally:
+        main.app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["token"] == "abcdef01"
+    assert set(body["current"]) == {"minute", "day"}
+    assert body["history"] == [
+        {
+            "date": time.strftime("%Y-%m-%d", time.gmtime(now)),
+            "endpoint": "/api/v1/role-explorer",
+            "requests": 2,
+        }
+    ]
+    assert missing.status_code == 401
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from shm_cache import SharedResponseCache
+from warming import CacheWarmer, CountMinSketch, HotKeyTracker, WarmClaims
+
+
+def test_sketch_never_underestimates():
+    sketch = CountMinSketch(width=64, depth=4)
+    counts = {f"key{i}": i % 7 + 1 for i in range(300)}
+    for key, count in counts.items():
+        sketch.add(key, count)
+    for key, count in counts.items():
+        assert sketch.estimate(key) >= count
+
+
+def test_sketch_is_exact_without_collisions():
+    sketch = CountMinSketch()
+    for _ in range(3):
+        sketch.add(("role", 30))
+    assert sketch.add(("role", 30)) == 4
+    assert sketch.estimate(("role", 30)) == 4
+    assert sketch.estimate(("role", 7)) == 0
+
+    sketch.decay()
+    assert sketch.estimate(("role", 30)) == 2
+
+
+def test_tracker_keeps_hottest_keys():
+    tracker = HotKeyTracker(capacity=3)
+    for key, count in (("a", 5), ("b", 1), ("c", 3), ("d", 4), ("e", 2)):
+        for _ in range(count):
+            tracker.record(key)
+    assert tracker.top(3) == ["a", "d", "c"]
+    assert tracker.top(1) == ["a"]
+
+
+def test_tracker_decay_drops_cold_keys():
+    tracker = HotKeyTracker(capacity=4)
+    for _ in range(4):
+        tracker.record("hot")
+    tracker.record("cold")
+    tracker.decay()
+    assert tracker.top(4) == ["hot"]
+
+
+@pytest.mark.asyncio
+async def test_warmer_recomputes_top_keys_with_bounded_concurrency():
+    warmer = CacheWarmer(top_k=2, concurrency=1, poll_seconds=0)
+    for key, count in (("a", 3), ("b", 2), ("c", 1)):
+        for _ in range(count):
+            warmer.record(key)
+    running = 0
+    warmed = []
+
+    async def warm_one(key, version):
+        nonlocal running
+        running += 1
+        assert running == 1
+        await asyncio.sleep(0)
+        warmed.append((key, version))
+        running -= 1
+
+    await warmer.warm(warm_one, "v2")
+    assert warmed == [("a", "v2"), ("b", "v2")]
+    assert warmer.stats()["warmed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_one_worker_warms_a_version(tmp_path):
+    path = str(tmp_path / "cache")
+    # One SharedResponseCache per worker, all on the same file.
+    first, second = (
+        CacheWarmer(
+            top_k=1,
+            concurrency=1,
+            poll_seconds=0,
+            claims=WarmClaims(SharedResponseCache(path, 8, 4096), 60, 60),
+        )
+        for _ in range(2)
+    )
+    for warmer in (first, second):
+        warmer.record("a")
+    warmed = []
+
+    async def warm_one(key, version):
+        # While the first worker warms, the second keeps its previous version.
+        assert not await second._warm_once(warm_one, version)
+        warmed.append((key, version))
+
+    assert await first._warm_once(warm_one, "v2")
+    assert await second._warm_once(warm_one, "v2")
+    assert warmed == [("a", "v2")]
+    assert second.stats()["warmed_elsewhere"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_claim_is_taken_over(tmp_path):
+    claims = WarmClaims(SharedResponseCache(str(tmp_path / "cache"), 8, 4096), 0.05, 60)
+    assert claims.claim("v2")
+    warmer = CacheWarmer(top_k=1, concurrency=1, poll_seconds=0, claims=claims)
+    warmer.record("a")
+    warmed = []
+
+    async def warm_one(key, version):
+        warmed.append(key)
+
+    assert not await warmer._warm_once(warm_one, "v2")
+    await asyncio.sleep(0.1)
+    assert await warmer._warm_once(warm_one, "v2")
+    assert warmed == ["a"]